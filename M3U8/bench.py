@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+from types import ModuleType
+
+from playwright.async_api import async_playwright
+from scrapers import pixel, roxie, tvapp
+from scrapers.utils import (
+    Cache,
+    ResolvedUrls,
+    Time,
+    breakers,
+    get_logger,
+    network,
+    scheduler,
+    timings,
+)
+from scrapers.utils.replay import harness
+
+log = get_logger(__name__)
+
+SOURCES: dict[str, ModuleType] = {
+    "pixel": pixel,
+    "roxie": roxie,
+    "tvapp": tvapp,
+}
+
+BASELINE_FILE = harness.root / "baseline.json"
+
+META_FILE = "meta.json"
+
+
+def isolate(module: ModuleType, cache_dir: Path) -> None:
+    module.urls.clear()
+
+    for obj in vars(module).values():
+        if isinstance(obj, Cache):
+            obj.file = cache_dir / obj.file.name
+
+        elif isinstance(obj, ResolvedUrls):
+            obj.cache.file = cache_dir / obj.cache.file.name
+
+            obj.entries = None
+
+    scheduler.demand.file = cache_dir / scheduler.demand.file.name
+
+    scheduler.demand.counts = {}
+
+    scheduler.start()
+
+    timings.file = cache_dir / timings.file.name
+
+    timings.data, timings.touched = {}, set()
+
+
+def freeze(ts: float) -> None:
+    Time.now = classmethod(lambda cls: cls.from_ts(ts))
+
+    Cache.now_ts = ts
+
+
+async def run_source(name: str, mode: str, cache_dir: Path) -> dict[str, float]:
+    module = SOURCES[name]
+
+    isolate(module, cache_dir)
+
+    breakers.breakers.clear()
+
+    meta_file = harness.root / name / META_FILE
+
+    if mode == "replay":
+        freeze(json.loads(meta_file.read_text(encoding="utf-8"))["now"])
+
+    await network.client.aclose()
+
+    network.client = network.build_client(transport=harness.start(mode, name))
+
+    async with async_playwright() as p:
+        browser = await network.browser(p)
+
+        try:
+            start = time.perf_counter()
+
+            await module.scrape(browser)
+
+            elapsed = time.perf_counter() - start
+
+        finally:
+            await browser.close()
+
+            await network.client.aclose()
+
+    stats = harness.stop()
+
+    if mode == "record":
+        meta_file.write_text(
+            json.dumps({"now": Cache.now_ts}, indent=2),
+            encoding="utf-8",
+        )
+
+    return {"seconds": round(elapsed, 3), "events": len(module.urls), **stats}
+
+
+def compare(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    tolerance: float,
+) -> bool:
+
+    ok = True
+
+    for name, result in results.items():
+        if not (base := baseline.get(name)):
+            log.info(f"{name}: no baseline")
+
+            continue
+
+        for metric, value in result.items():
+            prev = base.get(metric, 0)
+
+            worse = (
+                value > prev * (1 + tolerance) if metric == "seconds" else value != prev
+            )
+
+            ok &= not worse
+
+            log.log(
+                logging.WARNING if worse else logging.INFO,
+                f"{name}: {metric:<8} {prev:>10} -> {value:<10}"
+                f"{' REGRESSION' if worse else ''}",
+            )
+
+    return ok
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Record/replay scraper benchmarks")
+
+    parser.add_argument("mode", choices=["record", "replay"])
+
+    parser.add_argument("--sources", nargs="+", choices=SOURCES, default=[*SOURCES])
+
+    parser.add_argument("--save-baseline", action="store_true")
+
+    parser.add_argument("--tolerance", type=float, default=0.2)
+
+    args = parser.parse_args()
+
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.sources:
+            results[name] = await run_source(name, args.mode, Path(tmp))
+
+            log.info(f"{name}: {results[name]}")
+
+    if args.mode == "record":
+        return 0
+
+    if args.save_baseline:
+        BASELINE_FILE.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+        log.info(f"Baseline saved to {BASELINE_FILE.resolve()}")
+
+        return 0
+
+    try:
+        baseline = json.loads(BASELINE_FILE.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        log.warning("No baseline stored, run with --save-baseline first")
+
+        return 0
+
+    return 0 if compare(results, baseline, args.tolerance) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+import argparse
+from pathlib import Path
+
+from scrapers.utils import get_logger, guide
+
+log = get_logger(__name__)
+
+ROOT = Path(__file__).parent
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Merge XMLTV feeds, keeping only channels used by the playlists"
+    )
+
+    parser.add_argument("feeds", nargs="+", type=Path, help="XMLTV files (.xml/.gz)")
+
+    parser.add_argument(
+        "--playlists",
+        nargs="+",
+        type=Path,
+        default=[ROOT / "base.m3u8", ROOT / "TV.m3u8"],
+        help="playlists whose tvg-ids are kept",
+    )
+
+    parser.add_argument("--out", type=Path, default=ROOT / "TV.xml")
+
+    args = parser.parse_args()
+
+    ids = guide.wanted_ids(*args.playlists)
+
+    log.info(f"Keeping {len(ids)} tvg-id(s) from {len(args.playlists)} playlist(s)")
+
+    stats = guide.merge(args.feeds, ids, args.out)
+
+    log.info(f"EPG saved to {args.out.resolve()} ({stats})")
+
+
+if __name__ == "__main__":
+    main()
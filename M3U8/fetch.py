@@ -1,9 +1,19 @@
 #!/usr/bin/env python3
+import argparse
 import asyncio
+import json
+import multiprocessing
+import os
+import queue
 import re
+import time
+import zlib
+from collections.abc import Callable, Mapping
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from types import ModuleType
 
-from playwright.async_api import async_playwright
+from playwright.async_api import Browser, Playwright, async_playwright
 from scrapers import (
     cdnlivetv,
     embedhd,
@@ -27,7 +37,30 @@ from scrapers import (
     webcast,
     xstreameast,
 )
-from scrapers.utils import get_logger, network
+from scrapers.utils import (
+    BrowserPool,
+    Cache,
+    HLSProxy,
+    PlaylistServer,
+    Playlists,
+    StreamEntry,
+    Time,
+    breakers,
+    enable_async,
+    get_logger,
+    guide,
+    history,
+    merge,
+    network,
+    rate_limit,
+    run_stats,
+    scheduler,
+    stop_async,
+    timings,
+    tokens,
+    variants,
+    warmup,
+)
 
 log = get_logger(__name__)
 
@@ -37,6 +70,72 @@ EVENTS_FILE = Path(__file__).parent / "events.m3u8"
 
 COMBINED_FILE = Path(__file__).parent / "TV.m3u8"
 
+GUIDE_FILE = Path(__file__).parent / "events.xml"
+
+EPG_URL = "https://raw.githubusercontent.com/doms9/iptv/refs/heads/default/M3U8/TV.xml"
+
+PUBLISH_DELAY = 5
+
+GUIDE_URL = (
+    "https://raw.githubusercontent.com/doms9/iptv/refs/heads/default/M3U8/events.xml.gz"
+)
+
+SOURCES: list[ModuleType] = [
+    cdnlivetv,
+    embedhd,
+    fawa,
+    istreameast,
+    livetvsx,
+    ovogoal,
+    pawa,
+    pixel,
+    ppv,
+    roxie,
+    shark,
+    sport9,
+    streambtw,
+    streamcenter,
+    streamhub,
+    streamsgate,
+    totalsportek,
+    tvapp,
+    watchfooty,
+    webcast,
+    xstreameast,
+]
+
+MODULES = {m.__name__.rsplit(".", 1)[-1]: m for m in SOURCES}
+
+NAMES = {m: name for name, m in MODULES.items()}
+
+BROWSER_SCRAPERS: dict[ModuleType, str] = {
+    cdnlivetv: "headless",
+    embedhd: "headless",
+    pixel: "headless",
+    ppv: "external",
+    roxie: "headless",
+    sport9: "external",
+    streamcenter: "external",
+    # streamhub: "external",
+    streamsgate: "external",
+    totalsportek: "headless",
+    # tvapp: "headless",
+    webcast: "headless",
+}
+
+HTTPX_SCRAPERS: list[ModuleType] = [
+    fawa,
+    istreameast,
+    ovogoal,
+    pawa,
+    shark,
+    streambtw,
+    xstreameast,
+]
+
+# run one after another once everything else has finished
+LATE_SCRAPERS: list[ModuleType] = [watchfooty, livetvsx]
+
 
 def load_base() -> tuple[list[str], int]:
     log.info("Fetching base M3U8")
@@ -50,126 +149,584 @@ def load_base() -> tuple[list[str], int]:
     return data.splitlines(), last_chnl_num
 
 
-async def main() -> None:
-    log.info(f"{'=' * 10} Scraper Started {'=' * 10}")
+async def open_browsers(
+    p: Playwright,
+    shards: int = 0,
+) -> dict[str, Browser | BrowserPool]:
 
-    base_m3u8, tvg_chno = load_base()
+    if shards:
+        hdl_brwsr = await BrowserPool(p, shards).start()
+
+        network.pw_workers = network.PW_LIMIT * shards
+
+        network.PW_S = asyncio.Semaphore(network.pw_workers)
+
+    else:
+        hdl_brwsr = await network.browser(p)
+
+    xtrnl_brwsr = await network.browser(p, external=True)
+
+    return {"headless": hdl_brwsr, "external": xtrnl_brwsr}
+
+
+async def run_scraper(
+    module: ModuleType,
+    browsers: dict[str, Browser | BrowserPool],
+    on_done: Callable[[str, Mapping[str, StreamEntry]], None] | None = None,
+) -> None:
+
+    start = time.perf_counter()
+
+    run_stats.start(NAMES[module])
+
+    try:
+        if kind := BROWSER_SCRAPERS.get(module):
+            await module.scrape(browsers[kind])
+
+        elif module in LATE_SCRAPERS:
+            await module.scrape(browsers["external"])
+
+        else:
+            await module.scrape()
+
+    finally:
+        run_stats.record_duration(NAMES[module], time.perf_counter() - start)
+
+        run_stats.record_events(NAMES[module], len(module.urls))
+
+        if on_done:
+            on_done(NAMES[module], module.urls)
+
+
+async def warm_up(
+    modules: list[ModuleType],
+    browsers: dict[str, Browser | BrowserPool],
+) -> None:
+
+    base_urls = [m.BASE_URL for m in modules if hasattr(m, "BASE_URL")]
+
+    try:
+        await warmup.run(base_urls, browsers.values())
+    except Exception as e:
+        log.warning(f"Warm-up failed: {e}")
+
+
+async def scrape_all(
+    shards: int = 0,
+    warm: bool = True,
+    on_done: Callable[[str, Mapping[str, StreamEntry]], None] | None = None,
+) -> Mapping[str, StreamEntry]:
 
     async with async_playwright() as p:
+        browsers = {}
+
         try:
-            hdl_brwsr = await network.browser(p)
-
-            xtrnl_brwsr = await network.browser(p, external=True)
-
-            pw_tasks = [
-                asyncio.create_task(cdnlivetv.scrape(hdl_brwsr)),
-                asyncio.create_task(embedhd.scrape(hdl_brwsr)),
-                asyncio.create_task(pixel.scrape(hdl_brwsr)),
-                asyncio.create_task(ppv.scrape(xtrnl_brwsr)),
-                asyncio.create_task(roxie.scrape(hdl_brwsr)),
-                asyncio.create_task(sport9.scrape(xtrnl_brwsr)),
-                asyncio.create_task(streamcenter.scrape(xtrnl_brwsr)),
-                # asyncio.create_task(streamhub.scrape(xtrnl_brwsr)),
-                asyncio.create_task(streamsgate.scrape(xtrnl_brwsr)),
-                asyncio.create_task(totalsportek.scrape(hdl_brwsr)),
-                # asyncio.create_task(tvapp.scrape(hdl_brwsr)),
-                asyncio.create_task(webcast.scrape(hdl_brwsr)),
-            ]
-
-            httpx_tasks = [
-                asyncio.create_task(fawa.scrape()),
-                asyncio.create_task(istreameast.scrape()),
-                asyncio.create_task(ovogoal.scrape()),
-                asyncio.create_task(pawa.scrape()),
-                asyncio.create_task(shark.scrape()),
-                asyncio.create_task(streambtw.scrape()),
-                asyncio.create_task(xstreameast.scrape()),
-            ]
-
-            await asyncio.gather(*(pw_tasks + httpx_tasks))
-
-            # others
-            await watchfooty.scrape(xtrnl_brwsr)
-            await livetvsx.scrape(xtrnl_brwsr)
+            browsers = await open_browsers(p, shards)
 
-        finally:
-            await hdl_brwsr.close()
+            if warm:
+                await warm_up(SOURCES, browsers)
+
+            await asyncio.gather(
+                *(run_scraper(m, browsers, on_done) for m in BROWSER_SCRAPERS),
+                *(run_scraper(m, browsers, on_done) for m in HTTPX_SCRAPERS),
+            )
 
-            await xtrnl_brwsr.close()
+            for module in LATE_SCRAPERS:
+                await run_scraper(module, browsers, on_done)
+
+        finally:
+            for brwsr in browsers.values():
+                await brwsr.close()
 
             await network.client.aclose()
 
-    additions = (
-        cdnlivetv.urls
-        | embedhd.urls
-        | fawa.urls
-        | istreameast.urls
-        | livetvsx.urls
-        | ovogoal.urls
-        | pawa.urls
-        | pixel.urls
-        | ppv.urls
-        | roxie.urls
-        | shark.urls
-        | sport9.urls
-        | streambtw.urls
-        | streamcenter.urls
-        | streamhub.urls
-        | streamsgate.urls
-        | totalsportek.urls
-        | tvapp.urls
-        | watchfooty.urls
-        | webcast.urls
-        | xstreameast.urls
+            breakers.save()
+
+            timings.save()
+
+    return merge(module.urls for module in SOURCES)
+
+
+def pack(urls: Mapping[str, StreamEntry]) -> bytes:
+    return zlib.compress(
+        json.dumps(urls, separators=(",", ":"), default=StreamEntry.to_dict).encode(
+            "utf-8"
+        )
     )
 
-    live_events: list[str] = []
 
-    combined_channels: list[str] = []
+def unpack(payload: bytes) -> dict:
+    return json.loads(zlib.decompress(payload))
+
+
+async def worker(
+    names: list[str],
+    results: queue.Queue,
+    shards: int,
+    warm: bool = True,
+    budget: float | None = None,
+) -> None:
+
+    scheduler.start(budget)
+
+    async def run(name: str) -> None:
+        try:
+            await run_scraper(MODULES[name], browsers)
+        except Exception as e:
+            log.error(f"{name}: scraper failed: {e}")
+
+        await asyncio.to_thread(results.put, (name, pack(MODULES[name].urls)))
+
+    late = [n for n in names if MODULES[n] in LATE_SCRAPERS]
+
+    async with async_playwright() as p:
+        browsers = {}
+
+        try:
+            browsers = await open_browsers(p, shards)
+
+            if warm:
+                await warm_up([MODULES[n] for n in names], browsers)
+
+            await asyncio.gather(*(run(n) for n in names if n not in late))
+
+            for name in late:
+                await run(name)
+
+            await asyncio.to_thread(
+                results.put,
+                ("__stats__", pack(run_stats.snapshot())),
+            )
+
+        finally:
+            for brwsr in browsers.values():
+                await brwsr.close()
+
+            await network.client.aclose()
+
+            breakers.save()
+
+            timings.save()
+
 
-    for i, (event, info) in enumerate(
-        sorted(additions.items()),
-        start=1,
+def run_worker(
+    names: list[str],
+    results: queue.Queue,
+    shards: int,
+    warm: bool = True,
+    budget: float | None = None,
+) -> None:
+
+    asyncio.run(worker(names, results, shards, warm, budget))
+
+
+async def scrape_workers(
+    workers: int,
+    shards: int = 0,
+    warm: bool = True,
+    on_done: Callable[[str, Mapping[str, StreamEntry]], None] | None = None,
+) -> Mapping[str, StreamEntry]:
+
+    names = [NAMES[m] for m in [*BROWSER_SCRAPERS, *HTTPX_SCRAPERS]]
+
+    chunks = [names[i::workers] for i in range(workers)]
+
+    chunks[0] += [NAMES[m] for m in LATE_SCRAPERS]
+
+    collected: dict[str, dict[str, StreamEntry]] = {}
+
+    mp_ctx = multiprocessing.get_context("spawn")
+
+    loop = asyncio.get_running_loop()
+
+    with (
+        mp_ctx.Manager() as manager,
+        ProcessPoolExecutor(workers, mp_context=mp_ctx) as pool,
     ):
-        extinf_all = (
-            f'#EXTINF:-1 tvg-chno="{tvg_chno + i}" tvg-id="{info["id"]}" '
-            f'tvg-name="{event}" tvg-logo="{info["logo"]}" group-title="Live Events",{event}'
+        results = manager.Queue()
+
+        done = asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    pool,
+                    run_worker,
+                    chunk,
+                    results,
+                    shards,
+                    warm,
+                    scheduler.remaining(),
+                )
+                for chunk in chunks
+                if chunk
+            ),
+            return_exceptions=True,
         )
 
-        extinf_live = (
-            f'#EXTINF:-1 tvg-chno="{i}" tvg-id="{info["id"]}" '
-            f'tvg-name="{event}" tvg-logo="{info["logo"]}" group-title="Live Events",{event}'
-        )
+        while not done.done() or not results.empty():
+            try:
+                name, payload = await asyncio.to_thread(results.get, timeout=1)
+            except queue.Empty:
+                continue
+
+            if name == "__stats__":
+                run_stats.merge(unpack(payload))
+
+                continue
 
-        vlc_block = [
-            f'#EXTVLCOPT:http-referrer={info["base"]}',
-            f'#EXTVLCOPT:http-origin={info["base"]}',
-            f"#EXTVLCOPT:http-user-agent={network.UA}",
-            info["url"],
+            collected[name] = StreamEntry.from_map(unpack(payload))
+
+            MODULES[name].urls.update(collected[name])
+
+            if on_done:
+                on_done(name, collected[name])
+
+            log.info(f"Received {len(collected[name])} event(s) from {name}")
+
+        for exc in await done:
+            if isinstance(exc, Exception):
+                log.error(f"Worker failed: {exc}")
+
+    return merge(collected.get(name, {}) for name in MODULES)
+
+
+def build_playlists(
+    additions: Mapping[str, StreamEntry],
+    base_m3u8: list[str],
+    tvg_chno: int,
+) -> dict[str, str]:
+
+    playlists = Playlists(additions)
+
+    if base_m3u8 and base_m3u8[0].startswith("#EXTM3U"):
+        base_m3u8 = [
+            re.sub(r'url-tvg="([^"]*)"', rf'url-tvg="\1,{GUIDE_URL}"', base_m3u8[0]),
+            *base_m3u8[1:],
         ]
 
-        combined_channels.extend(["\n" + extinf_all, *vlc_block])
+    header = f'#EXTM3U url-tvg="{EPG_URL},{GUIDE_URL}"\n'
 
-        live_events.extend(["\n" + extinf_live, *vlc_block])
+    return {
+        COMBINED_FILE.name: "\n".join(base_m3u8 + playlists.lines(offset=tvg_chno)),
+        EVENTS_FILE.name: playlists.build_playlist(header=header),
+        **{
+            f"events/{slug}.m3u8": playlists.build_playlist(slug, header=header)
+            for slug in playlists.groups
+        },
+    }
 
-    COMBINED_FILE.write_text(
-        "\n".join(base_m3u8 + combined_channels),
-        encoding="utf-8",
-    )
 
-    log.info(f"Base + Events saved to {COMBINED_FILE.resolve()}")
+class Publisher:
+    def __init__(
+        self,
+        publish: Callable[[Mapping[str, StreamEntry]], object],
+        previous: dict[str, Mapping[str, StreamEntry]] | None = None,
+        delay: int | float = PUBLISH_DELAY,
+    ) -> None:
 
-    EVENTS_FILE.write_text(
-        '#EXTM3U url-tvg="https://raw.githubusercontent.com/doms9/iptv/refs/heads/default/M3U8/TV.xml"\n'
-        + "\n".join(live_events),
-        encoding="utf-8",
-    )
+        self.publish = publish
+
+        self.sources = dict(previous or {})
+
+        self.delay = delay
+
+        self.done: set[str] = set()
+
+        self.pending: asyncio.TimerHandle | None = None
+
+    def add(self, name: str, urls: Mapping[str, StreamEntry]) -> None:
+        self.sources[name] = urls
+
+        self.done.add(name)
+
+        if self.pending is None:
+            self.pending = asyncio.get_running_loop().call_later(self.delay, self.flush)
+
+    def merged(self) -> Mapping[str, StreamEntry]:
+        return merge(self.sources[name] for name in MODULES if name in self.sources)
+
+    def flush(self) -> None:
+        self.pending = None
+
+        try:
+            additions = self.merged()
+
+            self.publish(additions)
+
+            log.info(
+                f"Published {len(additions)} event(s), "
+                f"{len(self.done)}/{len(MODULES)} source(s) finished"
+            )
+        except Exception as e:
+            log.error(f"Partial playlist update failed: {e}")
+
+    def close(self) -> None:
+        if self.pending:
+            self.pending.cancel()
+
+            self.pending = None
+
+
+def write_atomic(file: Path, text: str) -> None:
+    tmp = file.with_name(f"{file.name}.tmp")
+
+    tmp.write_text(text, encoding="utf-8")
+
+    os.replace(tmp, file)
+
+
+async def main(
+    shards: int = 0,
+    workers: int = 0,
+    proxy: HLSProxy | None = None,
+    public_url: str = "",
+    variant: str = "master",
+    budget: int | None = None,
+    warm: bool = True,
+    previous: dict[str, Mapping[str, StreamEntry]] | None = None,
+    on_update: Callable[[dict[str, str]], None] | None = None,
+) -> tuple[dict[str, str], float | None]:
+
+    log.info(f"{'=' * 10} Scraper Started {'=' * 10}")
+
+    scheduler.start(budget)
+
+    base_m3u8, tvg_chno = load_base()
+
+    def publish(additions: Mapping[str, StreamEntry]) -> dict[str, str]:
+        if variant != "master":
+            additions = {
+                k: v | {"url": variants.choose(v, variant)}
+                for k, v in additions.items()
+            }
+
+        playlists = build_playlists(additions, base_m3u8, tvg_chno)
+
+        write_atomic(COMBINED_FILE, playlists[COMBINED_FILE.name])
+
+        write_atomic(EVENTS_FILE, playlists[EVENTS_FILE.name])
+
+        if proxy:
+            proxied = proxy.register(additions, public_url)
+
+            playlists = build_playlists(proxied, base_m3u8, tvg_chno)
+
+        if on_update:
+            on_update(playlists)
+
+        return playlists
+
+    publisher = Publisher(publish, previous)
+
+    try:
+        if workers:
+            additions = await scrape_workers(workers, shards, warm, publisher.add)
+
+        else:
+            additions = await scrape_all(shards, warm, publisher.add)
+
+    finally:
+        publisher.close()
+
+    warmup.remember(additions)
+
+    history.append(run_stats.record())
+
+    playlists = publish(additions)
+
+    log.info(f"Base + Events saved to {COMBINED_FILE.resolve()}")
 
     log.info(f"Events saved to {EVENTS_FILE.resolve()}")
 
+    guide.write(additions, GUIDE_FILE)
+
+    expires = tokens.earliest(additions)
+
+    rate_limit.flush()
+
+    return playlists, expires
+
+
+async def serve(
+    host: str,
+    port: int,
+    interval: int,
+    shards: int = 0,
+    workers: int = 0,
+    proxy: bool = False,
+    public_url: str | None = None,
+    variant: str = "master",
+    budget: int | None = None,
+    warm: bool = True,
+) -> None:
+
+    if proxy and not public_url:
+        raise ValueError("public_url is required when proxying streams")
+
+    hls_proxy = HLSProxy() if proxy else None
+
+    server = PlaylistServer(proxy=hls_proxy)
+
+    async with await server.start(host, port):
+        while True:
+            Cache.now_ts = Time.now().timestamp()
+
+            run_stats.reset()
+
+            previous = {NAMES[m]: dict(m.urls) for m in SOURCES if m.urls}
+
+            for module in SOURCES:
+                module.urls.clear()
+
+            if network.client.is_closed:
+                network.client = network.build_client()
+
+            wait = interval
+
+            try:
+                _, expires = await main(
+                    shards=shards,
+                    workers=workers,
+                    proxy=hls_proxy,
+                    public_url=(public_url or "").rstrip("/"),
+                    variant=variant,
+                    budget=budget,
+                    warm=warm,
+                    previous=previous,
+                    on_update=server.update,
+                )
+
+                scheduler.demand.save()
+
+                if expires:
+                    refresh_in = (
+                        expires - tokens.REFRESH_MARGIN - Time.now().timestamp()
+                    )
+
+                    wait = max(60, min(interval, refresh_in))
+
+                    log.info(
+                        f"Next regeneration in {wait:.0f}s (earliest token expiry)"
+                    )
+
+            except Exception as e:
+                log.error(f"Playlist regeneration failed: {e}")
+
+            await asyncio.sleep(wait)
+
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Fetch and build M3U8 playlists")
+
+    parser.add_argument(
+        "--shards",
+        type=int,
+        nargs="?",
+        const=os.cpu_count() or 1,
+        default=0,
+        help="spread headless browser work across N instances (default: core count)",
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="?",
+        const=os.cpu_count() or 1,
+        default=0,
+        help="run scrapers across N worker processes (default: core count)",
+    )
+
+    parser.add_argument(
+        "--variant",
+        choices=variants.POLICIES,
+        default="master",
+        help="emit the captured playlist or its best/lowest bandwidth variant",
+    )
+
+    parser.add_argument(
+        "--budget",
+        type=int,
+        help="seconds allowed for event resolution; lowest-priority events are skipped",
+    )
+
+    parser.add_argument(
+        "--no-warmup",
+        action="store_true",
+        help="skip the DNS/TLS and browser preconnect warm-up",
+    )
+
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="keep running and serve the playlists over HTTP",
+    )
+
+    parser.add_argument(
+        "--proxy",
+        action="store_true",
+        help="in --serve mode, proxy event streams and share upstream playlist fetches",
+    )
+
+    parser.add_argument("--public-url", help="base URL clients use to reach the server")
+
+    parser.add_argument("--host", default="0.0.0.0")
+
+    parser.add_argument(
+        "--log-async",
+        action="store_true",
+        help="write logs from a background thread instead of the event loop",
+    )
+
+    parser.add_argument(
+        "--log-json",
+        action="store_true",
+        help="write JSON-lines logs to logs/fetch.jsonl (implies --log-async)",
+    )
+
+    parser.add_argument("--port", type=int, default=8080)
+
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=3_600,
+        help="seconds between regenerations in --serve mode",
+    )
+
+    args = parser.parse_args()
+
+    if args.proxy and not args.public_url:
+        parser.error("--proxy requires --public-url (the address clients use)")
+
+    if args.log_async or args.log_json:
+        enable_async(json_lines=args.log_json)
+
+    if args.serve:
+        asyncio.run(
+            serve(
+                args.host,
+                args.port,
+                args.interval,
+                shards=args.shards,
+                workers=args.workers,
+                proxy=args.proxy,
+                public_url=args.public_url,
+                variant=args.variant,
+                budget=args.budget,
+                warm=not args.no_warmup,
+            )
+        )
+
+    else:
+        asyncio.run(
+            main(
+                shards=args.shards,
+                workers=args.workers,
+                variant=args.variant,
+                budget=args.budget,
+                warm=not args.no_warmup,
+            )
+        )
+
+    stop_async()
 
     for hndlr in log.handlers:
         hndlr.flush()
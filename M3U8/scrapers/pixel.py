@@ -4,11 +4,20 @@ from urllib.parse import urljoin
 
 from playwright.async_api import Browser, Page
 
-from .utils import Cache, Time, get_logger, leagues, network
+from .utils import (
+    Cache,
+    StreamEntry,
+    Time,
+    get_logger,
+    leagues,
+    network,
+    tokens,
+    variants,
+)
 
 log = get_logger(__name__)
 
-urls: dict[str, dict[str, str | float]] = {}
+urls: dict[str, StreamEntry] = {}
 
 TAG = "PIXEL"
 
@@ -34,7 +43,7 @@ async def get_api_data(page: Page) -> dict[str, list[dict, str, str]]:
     return json.loads(raw_json)
 
 
-async def get_events(page: Page) -> dict[str, dict[str, str | float]]:
+async def get_events(page: Page) -> dict[str, StreamEntry]:
     now = Time.clean(Time.now())
 
     api_data = await get_api_data(page)
@@ -63,24 +72,28 @@ async def get_events(page: Page) -> dict[str, dict[str, str | float]]:
 
                 tvg_id, logo = leagues.get_tvg_info(sport, event_name)
 
-                events[key] = {
-                    "url": stream_link,
-                    "logo": logo,
-                    "base": BASE_URL,
-                    "timestamp": now.timestamp(),
-                    "id": tvg_id or "Live.Event.us",
-                }
+                events[key] = StreamEntry(
+                    url=stream_link,
+                    logo=logo,
+                    base=BASE_URL,
+                    timestamp=now.timestamp(),
+                    event_ts=event_dt.timestamp(),
+                    id=tvg_id or "Live.Event.us",
+                )
 
     return events
 
 
 async def scrape(browser: Browser) -> None:
     if cached := CACHE_FILE.load():
-        urls.update(cached)
+        urls.update(StreamEntry.from_map(cached))
 
         log.info(f"Loaded {len(urls)} event(s) from cache")
 
-        return
+        if not CACHE_FILE.dropped:
+            return
+
+        log.info(f"{len(CACHE_FILE.dropped)} cached event(s) expiring, refreshing")
 
     log.info(f'Scraping from "{BASE_URL}"')
 
@@ -95,8 +108,15 @@ async def scrape(browser: Browser) -> None:
                 log=log,
             )
 
+    if events is network.SKIPPED:
+        return
+
     urls.update(events or {})
 
+    await variants.resolve_all(urls, log)
+
+    tokens.annotate(urls)
+
     CACHE_FILE.write(urls)
 
     log.info(f"Collected and cached {len(urls)} new event(s)")
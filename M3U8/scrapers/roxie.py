@@ -1,15 +1,30 @@
 import asyncio
+import time
 from functools import partial
 from urllib.parse import urljoin
 
-from playwright.async_api import Browser, Page, TimeoutError
+from playwright.async_api import Browser, BrowserContext, Page, TimeoutError
 from selectolax.parser import HTMLParser
 
-from .utils import Cache, Time, get_logger, leagues, network
+from .utils import (
+    BrowserPool,
+    Cache,
+    ResolvedUrls,
+    StreamEntry,
+    Time,
+    extractor,
+    get_logger,
+    leagues,
+    network,
+    scheduler,
+    timings,
+    tokens,
+    variants,
+)
 
 log = get_logger(__name__)
 
-urls: dict[str, dict[str, str | float]] = {}
+urls: dict[str, StreamEntry] = {}
 
 TAG = "ROXIE"
 
@@ -17,8 +32,12 @@ CACHE_FILE = Cache(TAG, exp=10_800)
 
 HTML_CACHE = Cache(f"{TAG}-html", exp=19_800)
 
+BUTTON_KEY = f"{log.name}:button"
+
 BASE_URL = "https://roxiestreams.info"
 
+RESOLVED = ResolvedUrls(TAG, BASE_URL)
+
 SPORT_ENDPOINTS = {
     "fighting": "Fighting",
     # "mlb": "MLB",
@@ -30,44 +49,71 @@ SPORT_ENDPOINTS = {
 }
 
 
-async def refresh_html_cache(
-    url: str,
-    sport: str,
-    now_ts: float,
-) -> dict[str, dict[str, str | float]]:
+ROW_SELECTOR = "table#eventsTable tbody tr"
 
-    events = {}
+LINK_SELECTOR = "td a"
 
-    if not (html_data := await network.request(url, log=log)):
-        return events
+TIMER_SELECTOR = "span.countdown-timer"
 
-    soup = HTMLParser(html_data.content)
+START_FMT = "%Y-%m-%d %H:%M"
 
-    for row in soup.css("table#eventsTable tbody tr"):
-        if not (a_tag := row.css_first("td a")):
-            continue
 
-        event = a_tag.text(strip=True)
+def parse_start(s: str) -> Time:
+    try:
+        return Time.from_str(s, fmt=START_FMT, timezone="PST")
+    except ValueError:
+        return Time.from_str(s, timezone="PST")
+
+
+def parse_listing(content: bytes) -> list[tuple[str, str, float]]:
+    records = []
+
+    for row in HTMLParser(content).css(ROW_SELECTOR):
+        if not (a_tag := row.css_first(LINK_SELECTOR)):
+            continue
 
         if not (href := a_tag.attributes.get("href")):
             continue
 
-        if not (span := row.css_first("span.countdown-timer")):
+        if not (span := row.css_first(TIMER_SELECTOR)):
             continue
 
         data_start = span.attributes["data-start"].rsplit(":", 1)[0]
 
-        event_dt = Time.from_str(data_start, timezone="PST")
+        records.append(
+            (
+                a_tag.text(strip=True),
+                href,
+                parse_start(data_start).timestamp(),
+            )
+        )
+
+    return records
+
+
+async def refresh_html_cache(
+    url: str,
+    sport: str,
+    now_ts: float,
+) -> dict[str, dict[str, str | float]] | None:
+
+    events = {}
+
+    if not (html_data := await network.request(url, log=log)):
+        return
+
+    records = await asyncio.to_thread(parse_listing, html_data.content)
 
-        event_sport = SPORT_ENDPOINTS[sport]
+    event_sport = SPORT_ENDPOINTS[sport]
 
+    for event, href, event_ts in records:
         key = f"[{event_sport}] {event} ({TAG})"
 
         events[key] = {
             "sport": event_sport,
             "event": event,
             "link": href,
-            "event_ts": event_dt.timestamp(),
+            "event_ts": event_ts,
             "timestamp": now_ts,
         }
 
@@ -92,6 +138,8 @@ async def process_event(
 
     page.on("request", handler)
 
+    started = time.perf_counter()
+
     try:
         await page.goto(
             url,
@@ -99,34 +147,28 @@ async def process_event(
             timeout=15_000,
         )
 
+        start = time.perf_counter()
+
         try:
             if btn := await page.wait_for_selector(
                 "button:has-text('Stream 1')",
-                timeout=5_000,
+                timeout=timings.wait(BUTTON_KEY, 5) * 1_000,
             ):
+                timings.record(BUTTON_KEY, time.perf_counter() - start)
+
                 await btn.click()
         except TimeoutError:
-            pass
+            timings.miss(BUTTON_KEY)
 
-        wait_task = asyncio.create_task(got_one.wait())
-
-        try:
-            await asyncio.wait_for(wait_task, timeout=6)
-        except asyncio.TimeoutError:
+        if not await network.wait_for_capture(got_one, url_num, 6, log):
             log.warning(f"URL {url_num}) Timed out waiting for M3U8.")
             return
 
-        finally:
-            if not wait_task.done():
-                wait_task.cancel()
-
-                try:
-                    await wait_task
-                except asyncio.CancelledError:
-                    pass
-
         if captured:
-            log.info(f"URL {url_num}) Captured M3U8")
+            log.info(
+                f"URL {url_num}) Captured M3U8",
+                extra={"duration": round(time.perf_counter() - started, 3)},
+            )
             return captured[0]
 
         log.warning(f"URL {url_num}) No M3U8 captured after waiting.")
@@ -159,9 +201,10 @@ async def get_events(cached_keys: list[str]) -> list[dict[str, str]]:
 
         results = await asyncio.gather(*tasks)
 
-        events = {k: v for data in results for k, v in data.items()}
+        events = {k: v for data in results if data for k, v in data.items()}
 
-        HTML_CACHE.write(events)
+        if all(data is not None for data in results):
+            HTML_CACHE.write(events)
 
     live = []
 
@@ -181,7 +224,7 @@ async def get_events(cached_keys: list[str]) -> list[dict[str, str]]:
 
 
 async def scrape(browser: Browser) -> None:
-    cached_urls = CACHE_FILE.load()
+    cached_urls = StreamEntry.from_map(CACHE_FILE.load())
 
     valid_urls = {k: v for k, v in cached_urls.items() if v["url"]}
 
@@ -197,10 +240,22 @@ async def scrape(browser: Browser) -> None:
 
     log.info(f"Processing {len(events)} new URL(s)")
 
-    if events:
-        async with network.event_context(browser) as context:
-            for i, ev in enumerate(events, start=1):
-                async with network.event_page(context) as page:
+    async def handle(
+        item: tuple[int, dict[str, str | float]],
+        context: BrowserContext | BrowserPool,
+    ) -> None:
+
+        nonlocal valid_count
+
+        i, ev = item
+
+        url = await RESOLVED.probe(ev["link"], i, log=log) or (
+            await extractor.extract(ev["link"], i, log=log)
+        )
+
+        if not url:
+            async with network.event_context(context) as event_context:
+                async with network.event_page(event_context) as page:
                     handler = partial(
                         process_event,
                         url=ev["link"],
@@ -215,32 +270,48 @@ async def scrape(browser: Browser) -> None:
                         log=log,
                     )
 
-                    sport, event, ts, link = (
-                        ev["sport"],
-                        ev["event"],
-                        ev["event_ts"],
-                        ev["link"],
-                    )
+        if url is network.SKIPPED:
+            return
+
+        if url:
+            RESOLVED.store(ev["link"], url)
+
+        sport, event, ts, link = (
+            ev["sport"],
+            ev["event"],
+            ev["event_ts"],
+            ev["link"],
+        )
+
+        tvg_id, logo = leagues.get_tvg_info(sport, event)
 
-                    tvg_id, logo = leagues.get_tvg_info(sport, event)
+        key = f"[{sport}] {event} ({TAG})"
 
-                    key = f"[{sport}] {event} ({TAG})"
+        entry = StreamEntry(
+            url=url,
+            logo=logo,
+            base=BASE_URL,
+            timestamp=ts,
+            event_ts=ts,
+            id=tvg_id or "Live.Event.us",
+            link=link,
+        )
+
+        cached_urls[key] = entry
 
-                    entry = {
-                        "url": url,
-                        "logo": logo,
-                        "base": BASE_URL,
-                        "timestamp": ts,
-                        "id": tvg_id or "Live.Event.us",
-                        "link": link,
-                    }
+        if url:
+            valid_count += 1
 
-                    cached_urls[key] = entry
+            urls[key] = entry
 
-                    if url:
-                        valid_count += 1
+    if events:
+        async with network.shared_context(browser) as context:
+            await network.for_each(
+                enumerate(scheduler.order(events, log), start=1),
+                partial(handle, context=context),
+            )
 
-                        urls[key] = entry
+        extractor.report(log)
 
     if new_count := valid_count - cached_count:
         log.info(f"Collected and cached {new_count} new event(s)")
@@ -248,4 +319,10 @@ async def scrape(browser: Browser) -> None:
     else:
         log.info("No new events found")
 
+    await variants.resolve_all(cached_urls, log)
+
+    tokens.annotate(cached_urls)
+
+    RESOLVED.save()
+
     CACHE_FILE.write(cached_urls)
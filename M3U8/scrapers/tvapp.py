@@ -1,14 +1,27 @@
 from functools import partial
 from urllib.parse import urljoin, urlparse
 
-from playwright.async_api import Browser
+from playwright.async_api import Browser, BrowserContext
 from selectolax.parser import HTMLParser
 
-from .utils import Cache, Time, get_logger, leagues, network
+from .utils import (
+    BrowserPool,
+    Cache,
+    ResolvedUrls,
+    StreamEntry,
+    Time,
+    extractor,
+    get_logger,
+    leagues,
+    network,
+    scheduler,
+    tokens,
+    variants,
+)
 
 log = get_logger(__name__)
 
-urls: dict[str, dict[str, str | float]] = {}
+urls: dict[str, StreamEntry] = {}
 
 TAG = "TVAPP"
 
@@ -16,6 +29,8 @@ CACHE_FILE = Cache(TAG, exp=86_400)
 
 BASE_URL = "https://thetvapp.to"
 
+RESOLVED = ResolvedUrls(TAG, BASE_URL)
+
 
 def fix_url(s: str) -> str:
     parsed = urlparse(s)
@@ -60,25 +75,38 @@ async def get_events() -> list[dict[str, str]]:
 
 
 async def scrape(browser: Browser) -> None:
-    if cached := CACHE_FILE.load():
-        urls.update(cached)
+    cached = StreamEntry.from_map(CACHE_FILE.load())
 
-        log.info(f"Loaded {len(urls)} event(s) from cache")
+    urls.update(cached)
 
-        return
+    log.info(f"Loaded {len(cached)} event(s) from cache")
 
     log.info(f'Scraping from "{BASE_URL}"')
 
-    events = await get_events()
+    events = [
+        ev
+        for ev in await get_events()
+        if f"[{ev['sport']}] {ev['event']} ({TAG})" not in cached
+    ]
 
     log.info(f"Processing {len(events)} new URL(s)")
 
-    if events:
-        now = Time.clean(Time.now())
+    now = Time.clean(Time.now())
+
+    async def handle(
+        item: tuple[int, dict[str, str]],
+        context: BrowserContext | BrowserPool,
+    ) -> None:
+
+        i, ev = item
 
-        async with network.event_context(browser) as context:
-            for i, ev in enumerate(events, start=1):
-                async with network.event_page(context) as page:
+        url = await RESOLVED.probe(ev["link"], i, log=log) or (
+            await extractor.extract(ev["link"], i, log=log)
+        )
+
+        if not url:
+            async with network.event_context(context) as event_context:
+                async with network.event_page(event_context) as page:
                     handler = partial(
                         network.process_event,
                         url=ev["link"],
@@ -94,28 +122,48 @@ async def scrape(browser: Browser) -> None:
                         log=log,
                     )
 
-                    if url:
-                        sport, event, link = (
-                            ev["sport"],
-                            ev["event"],
-                            ev["link"],
-                        )
+        if url is network.SKIPPED:
+            return
+
+        if url:
+            RESOLVED.store(ev["link"], url)
+
+            sport, event, link = (
+                ev["sport"],
+                ev["event"],
+                ev["link"],
+            )
+
+            key = f"[{sport}] {event} ({TAG})"
+
+            tvg_id, logo = leagues.get_tvg_info(sport, event)
+
+            entry = StreamEntry(
+                url=fix_url(url),
+                logo=logo,
+                base=BASE_URL,
+                timestamp=now.timestamp(),
+                id=tvg_id or "Live.Event.us",
+                link=link,
+            )
+
+            urls[key] = entry
+
+    if events:
+        async with network.shared_context(browser) as context:
+            await network.for_each(
+                enumerate(scheduler.order(events, log), start=1),
+                partial(handle, context=context),
+            )
 
-                        key = f"[{sport}] {event} ({TAG})"
+        extractor.report(log)
 
-                        tvg_id, logo = leagues.get_tvg_info(sport, event)
+    log.info(f"Collected and cached {len(urls) - len(cached)} new event(s)")
 
-                        entry = {
-                            "url": fix_url(url),
-                            "logo": logo,
-                            "base": BASE_URL,
-                            "timestamp": now.timestamp(),
-                            "id": tvg_id or "Live.Event.us",
-                            "link": link,
-                        }
+    await variants.resolve_all(urls, log)
 
-                        urls[key] = entry
+    tokens.annotate(urls)
 
-    log.info(f"Collected and cached {len(urls)} new event(s)")
+    RESOLVED.save()
 
     CACHE_FILE.write(urls)
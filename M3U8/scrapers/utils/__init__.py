@@ -1,12 +1,48 @@
+from .breaker import breakers
 from .caching import Cache
 from .config import Time, leagues
-from .logger import get_logger
-from .webwork import network
+from .entry import StreamEntry, merge
+from .epg import guide
+from .extract import extractor
+from .history import history, run_stats
+from .logger import enable_async, get_logger, rate_limit, stop_async
+from .playlist import Playlists
+from .priority import scheduler
+from .proxy import HLSProxy
+from .resolved import ResolvedUrls
+from .segments import SegmentCache
+from .server import PlaylistServer
+from .timing import timings
+from .tokens import tokens
+from .variants import variants
+from .warmup import warmup
+from .webwork import BrowserPool, network
 
 __all__ = [
+    "BrowserPool",
     "Cache",
+    "HLSProxy",
+    "PlaylistServer",
+    "Playlists",
+    "ResolvedUrls",
+    "SegmentCache",
+    "StreamEntry",
     "Time",
+    "breakers",
+    "enable_async",
+    "extractor",
     "get_logger",
+    "guide",
+    "history",
     "leagues",
+    "merge",
     "network",
+    "rate_limit",
+    "run_stats",
+    "scheduler",
+    "stop_async",
+    "timings",
+    "tokens",
+    "variants",
+    "warmup",
 ]
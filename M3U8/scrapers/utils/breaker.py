@@ -0,0 +1,135 @@
+import json
+from pathlib import Path
+
+from .config import Time
+
+
+class Breaker:
+    def __init__(
+        self,
+        threshold: int,
+        cooldown: int | float,
+        state: dict[str, int | float | None] | None = None,
+    ) -> None:
+
+        state = state or {}
+
+        self.threshold = threshold
+
+        self.cooldown = cooldown
+
+        self.failures: int = state.get("failures", 0)
+
+        self.opened_at: float | None = state.get("opened_at")
+
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+
+        if Time.now().timestamp() - self.opened_at < self.cooldown:
+            return "open"
+
+        return "half-open"
+
+    def allow(self) -> bool:
+        match self.state:
+            case "closed":
+                return True
+
+            case "open":
+                return False
+
+            case _:
+                if self.probing:
+                    return False
+
+                self.probing = True
+
+                return True
+
+    def success(self) -> None:
+        self.failures = 0
+
+        self.opened_at = None
+
+        self.probing = False
+
+    def release(self) -> None:
+        self.probing = False
+
+    def failure(self) -> bool:
+        self.failures += 1
+
+        tripped = self.probing or (
+            self.opened_at is None and self.failures >= self.threshold
+        )
+
+        if tripped:
+            self.opened_at = Time.now().timestamp()
+
+        self.probing = False
+
+        return tripped
+
+    def to_dict(self) -> dict[str, int | float | None]:
+        return {"failures": self.failures, "opened_at": self.opened_at}
+
+
+class Breakers:
+    def __init__(self, threshold: int = 5, cooldown: int | float = 900) -> None:
+        self.file = Path(__file__).parent.parent / "caches" / "breakers.json"
+
+        self.threshold = threshold
+
+        self.cooldown = cooldown
+
+        self.breakers = {
+            key: Breaker(threshold, cooldown, state)
+            for key, state in self.read().items()
+        }
+
+        self.touched: set[str] = set()
+
+    def read(self) -> dict[str, dict[str, int | float | None]]:
+        try:
+            return json.loads(self.file.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def get(self, key: str) -> Breaker:
+        self.touched.add(key)
+
+        if key not in self.breakers:
+            self.breakers[key] = Breaker(self.threshold, self.cooldown)
+
+        return self.breakers[key]
+
+    def save(self) -> None:
+        if not self.touched:
+            return
+
+        data = self.read() | {key: self.breakers[key].to_dict() for key in self.touched}
+
+        self.file.parent.mkdir(parents=True, exist_ok=True)
+
+        self.file.write_text(
+            json.dumps(
+                {
+                    key: state
+                    for key, state in data.items()
+                    if state["failures"] or state["opened_at"]
+                },
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+
+        self.touched.clear()
+
+
+breakers = Breakers()
+
+__all__ = ["breakers", "Breaker"]
@@ -1,35 +1,121 @@
 import json
+import os
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Iterator
 
 from .config import Time
+from .entry import StreamEntry
+from .history import run_stats
+from .tokens import tokens
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 
 
 class Cache:
     now_ts: float = Time.now().timestamp()
 
+    memory: dict[Path, tuple[int, dict]] = {}
+
     def __init__(self, filename: str, exp: int | float) -> None:
         self.file = Path(__file__).parent.parent / "caches" / f"{filename.lower()}.json"
 
         self.exp = exp
 
+        self.per_entry = True
+
+        self.dropped: set[str] = set()
+
     def is_fresh(self, entry: dict) -> bool:
+        expires = entry.get("expires")
+
+        if expires and self.now_ts >= expires - tokens.REFRESH_MARGIN:
+            return False
+
         ts: float | int = entry.get("timestamp", Time.default_8())
 
         dt_ts = Time.clean(Time.from_ts(ts)).timestamp()
 
         return self.now_ts - dt_ts < self.exp
 
-    def write(self, data: dict) -> None:
+    @contextmanager
+    def lock(self, exclusive: bool = False) -> Iterator[None]:
+        if not fcntl:
+            yield
+
+            return
+
+        self.file.parent.mkdir(parents=True, exist_ok=True)
+
+        with self.file.with_name(f"{self.file.name}.lock").open("a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+            try:
+                yield
+
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def read(self) -> dict:
+        try:
+            mtime = self.file.stat().st_mtime_ns
+        except FileNotFoundError:
+            self.memory.pop(self.file, None)
+
+            raise
+
+        if (cached := self.memory.get(self.file)) and cached[0] == mtime:
+            return cached[1]
+
+        data = json.loads(self.file.read_text(encoding="utf-8"))
+
+        self.memory[self.file] = (mtime, data)
+
+        return data
+
+    def write(
+        self,
+        data: dict,
+        merge: bool = True,
+        drop: set[str] | frozenset[str] = frozenset(),
+    ) -> None:
+
         self.file.parent.mkdir(parents=True, exist_ok=True)
 
-        self.file.write_text(
-            json.dumps(
-                data,
-                indent=2,
-                ensure_ascii=False,
-            ),
-            encoding="utf-8",
-        )
+        with self.lock(exclusive=True):
+            if merge and self.per_entry:
+                try:
+                    current = self.read()
+                except (FileNotFoundError, json.JSONDecodeError):
+                    current = {}
+
+                data = {
+                    **{
+                        k: v
+                        for k, v in current.items()
+                        if k not in drop and isinstance(v, dict) and self.is_fresh(v)
+                    },
+                    **data,
+                }
+
+            tmp = self.file.with_name(f"{self.file.name}.tmp")
+
+            tmp.write_text(
+                json.dumps(
+                    data,
+                    indent=2,
+                    ensure_ascii=False,
+                    default=StreamEntry.to_dict,
+                ),
+                encoding="utf-8",
+            )
+
+            os.replace(tmp, self.file)
+
+            self.memory.pop(self.file, None)
 
     def load(
         self,
@@ -37,13 +123,26 @@ class Cache:
         index: int | None = None,
     ) -> dict[str, dict[str, str | float]]:
 
+        self.per_entry = per_entry
+
+        self.dropped = set()
+
         try:
-            data: dict = json.loads(self.file.read_text(encoding="utf-8"))
+            with self.lock():
+                data: dict = self.read()
         except (FileNotFoundError, json.JSONDecodeError):
+            run_stats.record_cache(self.file.stem, 0, 1)
+
             return {}
 
         if per_entry:
-            return {k: v for k, v in data.items() if self.is_fresh(v)}
+            fresh = {k: v for k, v in data.items() if self.is_fresh(v)}
+
+            self.dropped = data.keys() - fresh.keys()
+
+            run_stats.record_cache(self.file.stem, len(fresh), len(data))
+
+            return fresh
 
         if index:
             ts: float | int = data[index].get("timestamp", Time.default_8())
@@ -53,7 +152,11 @@ class Cache:
 
         dt_ts = Time.clean(Time.from_ts(ts)).timestamp()
 
-        return data if self.is_fresh({"timestamp": dt_ts}) else {}
+        is_fresh = self.is_fresh({"timestamp": dt_ts})
+
+        run_stats.record_cache(self.file.stem, int(is_fresh), 1)
+
+        return dict(data) if is_fresh else {}
 
 
 __all__ = ["Cache"]
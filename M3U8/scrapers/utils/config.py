@@ -142,6 +142,15 @@ class Leagues:
 
         return (None, self.live_img)
 
+    @staticmethod
+    def group(tvg_id: str | None, sport: str = "") -> str:
+        if not tvg_id or tvg_id == "Live.Event.us":
+            return sport or "Other"
+
+        parts = re.sub(r"\.dummy\.us$", "", tvg_id, flags=re.I).split(".")
+
+        return parts[0] if parts[0].isupper() else " ".join(parts)
+
     def is_valid(
         self,
         event: str,
@@ -0,0 +1,250 @@
+import asyncio
+import json
+import socket
+import time
+import urllib.request
+from collections.abc import AsyncIterator, Iterable
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+import httpcore
+import httpx
+
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+SETUP_ERRORS = (
+    httpcore.ConnectError,
+    httpcore.ConnectTimeout,
+    httpcore.RemoteProtocolError,
+)
+
+IDEMPOTENT = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class DnsCache:
+    TTL = 3_600
+
+    LIMIT = 512
+
+    def __init__(self) -> None:
+        self.file = Path(__file__).parent.parent / "caches" / "dns.json"
+
+        try:
+            data = json.loads(self.file.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+
+        now = time.time()
+
+        self.hosts: dict[str, dict[str, str | float]] = {
+            host: entry
+            for host, entry in data.get("hosts", {}).items()
+            if now - entry["timestamp"] < self.TTL
+        }
+
+        self.streams: list[str] = data.get("streams", [])
+
+    def get(self, host: str) -> str | None:
+        entry = self.hosts.get(host)
+
+        if entry and time.time() - entry["timestamp"] < self.TTL:
+            return entry["addr"]
+
+    def put(self, host: str, addr: str) -> None:
+        self.hosts[host] = {"addr": addr, "timestamp": time.time()}
+
+    def forget(self, host: str) -> None:
+        self.hosts.pop(host, None)
+
+    async def resolve(self, host: str, port: int = 443) -> str | None:
+        if addr := self.get(host):
+            return addr
+
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(
+                host,
+                port,
+                type=socket.SOCK_STREAM,
+            )
+        except OSError as e:
+            logger.debug(f"Failed to resolve {host}: {e}")
+
+            return
+
+        addr = infos[0][4][0]
+
+        self.put(host, addr)
+
+        return addr
+
+    def remember(self, hosts: Iterable[str]) -> None:
+        self.streams = sorted(set(hosts))[: self.LIMIT]
+
+    def save(self) -> None:
+        self.file.parent.mkdir(parents=True, exist_ok=True)
+
+        hosts = dict(
+            sorted(self.hosts.items(), key=lambda kv: kv[1]["timestamp"])[-self.LIMIT :]
+        )
+
+        self.file.write_text(
+            json.dumps({"hosts": hosts, "streams": self.streams}, indent=2),
+            encoding="utf-8",
+        )
+
+
+class CachedBackend(httpcore.AsyncNetworkBackend):
+    def __init__(self, cache: DnsCache) -> None:
+        self.cache = cache
+
+        self.backend = httpcore.AnyIOBackend()
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: float | None = None,
+        local_address: str | None = None,
+        socket_options=None,
+    ) -> httpcore.AsyncNetworkStream:
+
+        if addr := self.cache.get(host):
+            try:
+                return await self.backend.connect_tcp(
+                    addr, port, timeout, local_address, socket_options
+                )
+            except httpcore.ConnectError:
+                self.cache.forget(host)
+
+        stream = await self.backend.connect_tcp(
+            host, port, timeout, local_address, socket_options
+        )
+
+        if server_addr := stream.get_extra_info("server_addr"):
+            self.cache.put(host, server_addr[0])
+
+        return stream
+
+    async def connect_unix_socket(
+        self,
+        path: str,
+        timeout: float | None = None,
+        socket_options=None,
+    ) -> httpcore.AsyncNetworkStream:
+
+        return await self.backend.connect_unix_socket(path, timeout, socket_options)
+
+    async def sleep(self, seconds: float) -> None:
+        await self.backend.sleep(seconds)
+
+
+@contextmanager
+def httpx_errors() -> Iterator[None]:
+    try:
+        yield
+    except httpcore.TimeoutException as e:
+        raise getattr(httpx, type(e).__name__, httpx.TimeoutException)(str(e)) from e
+
+    except (httpcore.NetworkError, httpcore.ProtocolError) as e:
+        raise getattr(httpx, type(e).__name__, httpx.TransportError)(str(e)) from e
+
+    except httpcore.UnsupportedProtocol as e:
+        raise httpx.UnsupportedProtocol(str(e)) from e
+
+
+class CachedStream(httpx.AsyncByteStream):
+    def __init__(self, stream: AsyncIterator[bytes]) -> None:
+        self.stream = stream
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        with httpx_errors():
+            async for chunk in self.stream:
+                yield chunk
+
+    async def aclose(self) -> None:
+        if hasattr(self.stream, "aclose"):
+            await self.stream.aclose()
+
+
+class CachedTransport(httpx.AsyncBaseTransport):
+    def __init__(self, cache: DnsCache, limits: httpx.Limits, http2: bool) -> None:
+        self.cache = cache
+
+        self.pool = httpcore.AsyncConnectionPool(
+            max_connections=limits.max_connections,
+            max_keepalive_connections=limits.max_keepalive_connections,
+            keepalive_expiry=limits.keepalive_expiry,
+            http1=True,
+            http2=http2,
+            network_backend=CachedBackend(cache),
+        )
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        req = httpcore.Request(
+            method=request.method,
+            url=httpcore.URL(
+                scheme=request.url.raw_scheme,
+                host=request.url.raw_host,
+                port=request.url.port,
+                target=request.url.raw_path,
+            ),
+            headers=request.headers.raw,
+            content=request.stream,
+            extensions=request.extensions,
+        )
+
+        with httpx_errors():
+            try:
+                resp = await self.pool.handle_async_request(req)
+            except SETUP_ERRORS:
+                host = request.url.host
+
+                if request.method not in IDEMPOTENT or not self.cache.get(host):
+                    raise
+
+                self.cache.forget(host)
+
+                resp = await self.pool.handle_async_request(req)
+
+        return httpx.Response(
+            status_code=resp.status,
+            headers=resp.headers,
+            stream=CachedStream(resp.stream),
+            extensions=resp.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self.pool.aclose()
+
+    @staticmethod
+    def proxy_mounts(
+        limits: httpx.Limits,
+        http2: bool,
+    ) -> dict[str, httpx.AsyncBaseTransport | None]:
+
+        proxies = urllib.request.getproxies()
+
+        mounts: dict[str, httpx.AsyncBaseTransport | None] = {
+            f"{scheme}://": httpx.AsyncHTTPTransport(
+                proxy=url,
+                limits=limits,
+                http2=http2,
+            )
+            for scheme, url in proxies.items()
+            if scheme in {"http", "https", "all"}
+        }
+
+        if mounts:
+            for host in proxies.get("no", "").split(","):
+                if host := host.strip().lstrip("."):
+                    mounts[f"all://*{host}"] = None
+
+        return mounts
+
+
+dns = DnsCache()
+
+__all__ = ["dns", "CachedBackend", "CachedTransport", "DnsCache"]
@@ -0,0 +1,107 @@
+import sys
+from collections.abc import Iterable, Iterator, Mapping, MutableMapping
+from typing import Any
+
+FIELDS = (
+    "url",
+    "logo",
+    "base",
+    "timestamp",
+    "id",
+    "link",
+    "event_ts",
+    "expires",
+    "variants",
+)
+
+INTERNED = frozenset({"logo", "base", "id"})
+
+
+class StreamEntry(MutableMapping):
+    __slots__ = (*FIELDS, "extra")
+
+    def __init__(self, **fields: Any) -> None:
+        self.extra: dict[str, Any] | None = None
+
+        for key, value in fields.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "StreamEntry":
+        return data if isinstance(data, cls) else cls(**data)
+
+    @classmethod
+    def from_map(
+        cls,
+        data: Mapping[str, Mapping[str, Any]],
+    ) -> dict[str, "StreamEntry"]:
+
+        return {key: cls.from_dict(value) for key, value in data.items()}
+
+    def to_dict(self) -> dict[str, Any]:
+        return dict(self.items())
+
+    def __getitem__(self, key: str) -> Any:
+        if key in FIELDS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+
+        if self.extra is None:
+            raise KeyError(key)
+
+        return self.extra[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in INTERNED and isinstance(value, str):
+            value = sys.intern(value)
+
+        if key in FIELDS:
+            setattr(self, key, value)
+
+        else:
+            if self.extra is None:
+                self.extra = {}
+
+            self.extra[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key in FIELDS:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+
+        elif self.extra is None:
+            raise KeyError(key)
+
+        else:
+            del self.extra[key]
+
+    def __iter__(self) -> Iterator[str]:
+        for key in FIELDS:
+            if hasattr(self, key):
+                yield key
+
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __or__(self, other: Mapping[str, Any]) -> "StreamEntry":
+        return self.__class__(**{**self, **other})
+
+    def __repr__(self) -> str:
+        return f"StreamEntry({self.to_dict()!r})"
+
+
+def merge(
+    sources: Iterable[Mapping[str, StreamEntry]],
+) -> dict[str, StreamEntry]:
+
+    return {key: entry for source in sources for key, entry in source.items()}
+
+
+__all__ = ["merge", "StreamEntry"]
@@ -0,0 +1,245 @@
+import gzip
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import xml.etree.ElementTree as ET
+from collections.abc import Iterable
+from pathlib import Path
+from typing import IO
+from xml.sax.saxutils import escape, quoteattr
+
+from .caching import Cache
+from .config import Time
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+KEY_PATTERN = re.compile(r"^\[(?P<sport>[^\]]*)\]\s*(?P<title>.*?)(?:\s+\(\w+\))?$")
+
+XMLTV_FMT = "%Y%m%d%H%M%S %z"
+
+TVG_ID_PATTERN = re.compile(r'tvg-id="([^"]+)"')
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n<tv>\n'
+
+
+class Guide:
+    DURATION = 3 * 3_600
+
+    def __init__(self) -> None:
+        self.state = Cache("epg", exp=86_400)
+
+    @staticmethod
+    def channel_id(event: str) -> str:
+        return re.sub(r"[^A-Za-z0-9]+", ".", event).strip(".")
+
+    def programme(self, event: str, info: dict[str, str | float]) -> dict[str, str]:
+        m = KEY_PATTERN.match(event)
+
+        sport, title = (m["sport"], m["title"]) if m else ("", event)
+
+        if event_ts := info.get("event_ts"):
+            start, stop = event_ts, event_ts + self.DURATION
+
+        else:
+            start = Time.default_8()
+
+            stop = start + 86_400
+
+        return {
+            "channel": info.get("id") or self.channel_id(event),
+            "name": event,
+            "title": title,
+            "sport": sport,
+            "logo": info.get("logo") or "",
+            "start": Time.from_ts(start).strftime(XMLTV_FMT),
+            "stop": Time.from_ts(stop).strftime(XMLTV_FMT),
+        }
+
+    @staticmethod
+    def fingerprint(fields: dict[str, str]) -> str:
+        return hashlib.sha1("\x1f".join(fields.values()).encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def render(fields: dict[str, str]) -> dict[str, str]:
+        channel = quoteattr(fields["channel"])
+
+        icon = (
+            f'    <icon src={quoteattr(fields["logo"])} />\n' if fields["logo"] else ""
+        )
+
+        return {
+            "id": fields["channel"],
+            "channel": (
+                f"  <channel id={channel}>\n"
+                f'    <display-name>{escape(fields["channel"])}</display-name>\n'
+                f"{icon}"
+                "  </channel>\n"
+            ),
+            "programme": (
+                f'  <programme start="{fields["start"]}" stop="{fields["stop"]}" '
+                f"channel={channel}>\n"
+                f'    <title>{escape(fields["title"])}</title>\n'
+                f'    <category>{escape(fields["sport"])}</category>\n'
+                f"{icon}"
+                "  </programme>\n"
+            ),
+        }
+
+    def write(self, additions: dict[str, dict[str, str | float]], file: Path) -> bool:
+        previous = self.state.load()
+
+        gz_file = file.with_name(f"{file.name}.gz")
+
+        now = Time.now().timestamp()
+
+        current: dict[str, dict[str, str | float]] = {}
+
+        for event, info in sorted(additions.items()):
+            fields = self.programme(event, info)
+
+            digest = self.fingerprint(fields)
+
+            if cached := previous.get(digest):
+                current[digest] = cached
+
+            else:
+                current[digest] = self.render(fields) | {"timestamp": now}
+
+        reused = len(current.keys() & previous.keys())
+
+        if current.keys() == previous.keys() and file.exists() and gz_file.exists():
+            logger.info(f"EPG unchanged ({len(current)} programme(s)), skipping write")
+
+            return False
+
+        tmp, gz_tmp = file.with_suffix(".tmp"), gz_file.with_suffix(".tmp")
+
+        with (
+            tmp.open("w", encoding="utf-8") as f,
+            gzip.open(gz_tmp, "wt", encoding="utf-8") as gz,
+        ):
+
+            def emit(chunk: str) -> None:
+                f.write(chunk)
+
+                gz.write(chunk)
+
+            emit(XML_HEADER)
+
+            channels = {entry.get("id"): entry["channel"] for entry in current.values()}
+
+            for chunk in channels.values():
+                emit(chunk)
+
+            for entry in current.values():
+                emit(entry["programme"])
+
+            emit("</tv>\n")
+
+        os.replace(tmp, file)
+
+        os.replace(gz_tmp, gz_file)
+
+        self.state.write(current, merge=False)
+
+        logger.info(
+            f"EPG saved to {file.resolve()} "
+            f"({len(current)} programme(s), {len(current) - reused} rendered)"
+        )
+
+        return True
+
+    @staticmethod
+    def wanted_ids(*playlists: Path) -> frozenset[str]:
+        ids = set()
+
+        for playlist in playlists:
+            try:
+                ids.update(TVG_ID_PATTERN.findall(playlist.read_text(encoding="utf-8")))
+            except FileNotFoundError:
+                continue
+
+        return frozenset(ids)
+
+    @staticmethod
+    def open(file: Path, mode: str, compressed: bool | None = None) -> IO:
+        if compressed is None:
+            compressed = file.suffix == ".gz"
+
+        return gzip.open(file, mode) if compressed else file.open(mode)
+
+    def merge(
+        self,
+        feeds: Iterable[Path],
+        ids: frozenset[str],
+        file: Path,
+    ) -> dict[str, int]:
+
+        owners: dict[str, int] = {}
+
+        stats = {"channels": 0, "programmes": 0, "skipped": 0}
+
+        tmp = file.with_name(f"{file.name}.tmp")
+
+        with (
+            self.open(tmp, "wb", compressed=file.suffix == ".gz") as out,
+            tempfile.TemporaryFile() as spool,
+        ):
+            out.write(XML_HEADER.encode("utf-8"))
+
+            for n, feed in enumerate(feeds):
+                with self.open(feed, "rb") as src:
+                    context = ET.iterparse(src, events=("start", "end"))
+
+                    _, root = next(context)
+
+                    for event, elem in context:
+                        if event != "end" or elem.tag not in {"channel", "programme"}:
+                            continue
+
+                        if elem.tag == "channel":
+                            channel = elem.get("id")
+
+                            if channel in ids and channel not in owners:
+                                owners[channel] = n
+
+                                elem.tail = None
+
+                                out.write(b"  " + ET.tostring(elem) + b"\n")
+
+                                stats["channels"] += 1
+
+                            else:
+                                stats["skipped"] += 1
+
+                        elif owners.get(elem.get("channel")) == n:
+                            elem.tail = None
+
+                            spool.write(b"  " + ET.tostring(elem) + b"\n")
+
+                            stats["programmes"] += 1
+
+                        else:
+                            stats["skipped"] += 1
+
+                        root.clear()
+
+                logger.info(f"Merged {feed.name} ({stats})")
+
+            spool.seek(0)
+
+            shutil.copyfileobj(spool, out)
+
+            out.write(b"</tv>\n")
+
+        os.replace(tmp, file)
+
+        return stats
+
+
+guide = Guide()
+
+__all__ = ["guide", "Guide"]
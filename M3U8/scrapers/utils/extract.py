@@ -0,0 +1,193 @@
+import base64
+import logging
+import re
+from collections.abc import Callable
+from urllib.parse import urljoin
+
+from selectolax.parser import HTMLParser
+
+from .logger import get_logger
+from .webwork import network
+
+logger = get_logger(__name__)
+
+ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+URL_PATTERN = re.compile(
+    r"""https?:(?:\\?/){2}[^\s"'<>`]+?\.m3u8[^\s"'<>`]*""",
+    re.IGNORECASE,
+)
+
+B64_PATTERN = re.compile(r"""["']([A-Za-z0-9+/]{16,}={0,2})["']""")
+
+ATOB_PATTERN = re.compile(r"""atob\(\s*["']([A-Za-z0-9+/=]+)["']\s*\)""")
+
+PACKED_PATTERN = re.compile(
+    r"""}\(\s*'(.*?)',\s*(\d+),\s*(\d+),\s*'(.*?)'\.split\('\|'\)""",
+    re.DOTALL,
+)
+
+
+def b64(s: str) -> str | None:
+    try:
+        return base64.b64decode(s + "=" * (-len(s) % 4)).decode("utf-8")
+    except (ValueError, UnicodeDecodeError):
+        return
+
+
+def decode_base64(text: str) -> list[str]:
+    return [s for m in B64_PATTERN.finditer(text) if (s := b64(m[1]))]
+
+
+def decode_atob(text: str) -> list[str]:
+    decoded = []
+
+    for m in ATOB_PATTERN.finditer(text):
+        s = m[1]
+
+        for _ in range(3):
+            if not (s := b64(s)):
+                break
+
+            decoded.append(s)
+
+    return decoded
+
+
+def decode_packed(text: str) -> list[str]:
+    def unbase(word: str, radix: int) -> int:
+        if radix <= 36:
+            return int(word, radix)
+
+        n = 0
+
+        for c in word:
+            n = n * radix + ALPHABET.index(c)
+
+        return n
+
+    decoded = []
+
+    for m in PACKED_PATTERN.finditer(text):
+        payload, radix, symtab = m[1], int(m[2]), m[4].split("|")
+
+        def lookup(word: re.Match) -> str:
+            try:
+                idx = unbase(word[0], radix)
+            except ValueError:
+                return word[0]
+
+            return symtab[idx] if idx < len(symtab) and symtab[idx] else word[0]
+
+        decoded.append(re.sub(r"\b\w+\b", lookup, payload))
+
+    return decoded
+
+
+class Extractor:
+    def __init__(self, max_depth: int = 2) -> None:
+        self.max_depth = max_depth
+
+        self.decoders: dict[str, Callable[[str], list[str]]] = {
+            "base64": decode_base64,
+            "atob": decode_atob,
+            "packed": decode_packed,
+        }
+
+        self.stats: dict[str, list[int]] = {}
+
+    def register(self, name: str, decoder: Callable[[str], list[str]]) -> None:
+        self.decoders[name] = decoder
+
+    def find_urls(self, text: str) -> list[str]:
+        return [
+            url
+            for m in URL_PATTERN.finditer(text)
+            if network.M3U8_PATTERN.search(url := m[0].replace("\\/", "/"))
+        ]
+
+    def scan(self, html: str, soup: HTMLParser) -> str | None:
+        if found := self.find_urls(html):
+            return found[0]
+
+        texts = [s.text() for s in soup.css("script") if not s.attributes.get("src")]
+
+        for _ in range(2):
+            texts = [
+                decoded
+                for text in texts
+                for decoder in self.decoders.values()
+                for decoded in decoder(text)
+            ]
+
+            for text in texts:
+                if found := self.find_urls(text):
+                    return found[0]
+
+    async def resolve(
+        self,
+        url: str,
+        log: logging.Logger,
+        referer: str | None = None,
+        depth: int = 0,
+    ) -> str | None:
+
+        headers = {"Referer": referer} if referer else {}
+
+        async with network.HTTP_S:
+            r = await network.request(url, log=log, headers=headers)
+
+        if not r:
+            return
+
+        soup = HTMLParser(r.text)
+
+        if m3u8 := self.scan(r.text, soup):
+            return m3u8
+
+        if depth >= self.max_depth:
+            return
+
+        for iframe in soup.css("iframe[src]"):
+            src = iframe.attributes["src"]
+
+            if not src or src.startswith(("about:", "javascript:")):
+                continue
+
+            if m3u8 := await self.resolve(urljoin(url, src), log, url, depth + 1):
+                return m3u8
+
+    async def extract(
+        self,
+        url: str,
+        url_num: int,
+        log: logging.Logger | None = None,
+    ) -> str | None:
+
+        log = log or logger
+
+        stats = self.stats.setdefault(log.name, [0, 0])
+
+        stats[1] += 1
+
+        if m3u8 := await self.resolve(url, log):
+            stats[0] += 1
+
+            log.info(f"URL {url_num}) Extracted M3U8 without browser")
+
+        return m3u8
+
+    def report(self, log: logging.Logger | None = None) -> None:
+        log = log or logger
+
+        if not (stats := self.stats.get(log.name)) or not stats[1]:
+            return
+
+        hits, total = stats
+
+        log.info(f"Static extraction hit rate: {hits}/{total} ({hits / total:.0%})")
+
+
+extractor = Extractor()
+
+__all__ = ["extractor", "Extractor"]
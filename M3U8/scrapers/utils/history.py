@@ -0,0 +1,106 @@
+import json
+import time
+from pathlib import Path
+
+from .config import Time
+
+
+class RunStats:
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.started = time.perf_counter()
+
+        self.tags: dict[str, dict[str, int | float | list[int]]] = {}
+
+        self.starts: dict[str, float] = {}
+
+    def tag(self, source: str) -> dict[str, int | float | list[int]]:
+        return self.tags.setdefault(source.rsplit(".", 1)[-1].upper(), {})
+
+    def start(self, source: str) -> None:
+        self.starts[source.rsplit(".", 1)[-1].upper()] = time.perf_counter()
+
+    def record_first(self, source: str) -> None:
+        tag = source.rsplit(".", 1)[-1].upper()
+
+        if "first_capture" in (stats := self.tag(source)) or tag not in self.starts:
+            return
+
+        stats["first_capture"] = round(time.perf_counter() - self.starts[tag], 3)
+
+    def record_events(self, source: str, count: int) -> None:
+        self.tag(source)["events"] = count
+
+    def record_duration(self, source: str, seconds: float) -> None:
+        self.tag(source)["duration"] = round(seconds, 3)
+
+    def record_capture(self, source: str, ok: bool) -> None:
+        captures = self.tag(source).setdefault("captures", [0, 0])
+
+        captures[0] += ok
+
+        captures[1] += 1
+
+    def record_cache(self, source: str, hits: int, total: int) -> None:
+        cache = self.tag(source).setdefault("cache", [0, 0])
+
+        cache[0] += hits
+
+        cache[1] += total
+
+    def snapshot(self) -> dict[str, dict[str, int | float | list[int]]]:
+        return self.tags
+
+    def merge(self, snapshot: dict[str, dict[str, int | float | list[int]]]) -> None:
+        for tag, stats in snapshot.items():
+            current = self.tags.setdefault(tag, {})
+
+            for key, value in stats.items():
+                if isinstance(value, list) and key in current:
+                    current[key] = [a + b for a, b in zip(current[key], value)]
+
+                else:
+                    current[key] = value
+
+    def record(self) -> dict:
+        return {
+            "ts": Time.now().timestamp(),
+            "duration": round(time.perf_counter() - self.started, 3),
+            "tags": self.tags,
+        }
+
+
+class History:
+    def __init__(self) -> None:
+        self.file = Path(__file__).parent.parent / "caches" / "history.jsonl"
+
+    def append(self, record: dict) -> None:
+        self.file.parent.mkdir(parents=True, exist_ok=True)
+
+        with self.file.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def load(self, limit: int | None = None) -> list[dict]:
+        try:
+            lines = self.file.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return []
+
+        records = []
+
+        for line in lines[-limit:] if limit else lines:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+
+        return records
+
+
+run_stats = RunStats()
+
+history = History()
+
+__all__ = ["history", "run_stats", "History", "RunStats"]
@@ -1,5 +1,9 @@
+import json
 import logging
-from logging.handlers import TimedRotatingFileHandler
+import queue
+import re
+import time
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 from pathlib import Path
 
 LOG_DIR = Path(__file__).parent.parent.parent / "logs"
@@ -38,21 +42,105 @@ class ColorFormatter(logging.Formatter):
         return formatted
 
 
-def get_logger(name: str | None = None) -> logging.Logger:
-    if not name:
-        name = Path(__file__).stem
+class JsonFormatter(logging.Formatter):
+    URL_NUM = re.compile(r"^URL (\d+)\)")
 
-    logger = logging.getLogger(name)
+    def format(self, record) -> str:
+        message = record.getMessage()
 
-    logger.setLevel(logging.INFO)
+        payload = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S%z"),
+            "level": record.levelname,
+            "logger": record.name,
+            "tag": getattr(record, "tag", record.name.rsplit(".", 1)[-1].upper()),
+            "msg": message,
+        }
 
-    if logger.hasHandlers():
-        return logger
+        if url_num := getattr(record, "url_num", None):
+            payload["url_num"] = url_num
+
+        elif m := self.URL_NUM.match(message):
+            payload["url_num"] = int(m[1])
+
+        if (duration := getattr(record, "duration", None)) is not None:
+            payload["duration"] = duration
+
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+
+        return json.dumps(payload, ensure_ascii=False)
+
+
+class RateLimitFilter(logging.Filter):
+    NUMBERS = re.compile(r"\d+(?:\.\d+)?")
+
+    def __init__(self, burst: int = 3, window: int | float = 60) -> None:
+        super().__init__()
+
+        self.burst = burst
+
+        self.window = window
+
+        self.seen: dict[str, list[float | int]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno != logging.WARNING:
+            return True
+
+        key = f"{record.name}:{self.NUMBERS.sub('#', str(record.msg))}"
+
+        now = time.monotonic()
+
+        start, count, suppressed = self.seen.get(key, (now, 0, 0))
+
+        if now - start >= self.window:
+            if suppressed:
+                record.msg = f"{record.msg} [+{suppressed} similar suppressed]"
+
+            self.seen[key] = [now, 1, 0]
+
+            return True
+
+        if count < self.burst:
+            self.seen[key] = [start, count + 1, suppressed]
+
+            return True
+
+        self.seen[key] = [start, count, suppressed + 1]
+
+        return False
+
+    def flush(self) -> None:
+        for key, (_, _, suppressed) in list(self.seen.items()):
+            if not suppressed:
+                continue
+
+            name, _, msg = key.partition(":")
+
+            logging.getLogger(name).info(
+                f"{suppressed} similar warning(s) suppressed: {msg}"
+            )
+
+        self.seen.clear()
+
+
+rate_limit = RateLimitFilter()
+
+LOGGERS: list[logging.Logger] = []
 
+ASYNC_STATE: dict[str, QueueHandler | QueueListener | None] = {
+    "handler": None,
+    "listener": None,
+}
+
+SYNC_HANDLERS: dict[str, list[logging.Handler]] = {}
+
+
+def build_handlers(json_lines: bool = False) -> list[logging.Handler]:
     formatting = {"fmt": LOG_FMT, "datefmt": "%Y-%m-%d | %H:%M:%S"}
 
     file_handler = TimedRotatingFileHandler(
-        LOG_DIR / "fetch.log",
+        LOG_DIR / ("fetch.jsonl" if json_lines else "fetch.log"),
         when="midnight",
         interval=1,
         backupCount=3,
@@ -60,19 +148,87 @@ def get_logger(name: str | None = None) -> logging.Logger:
         utc=False,
     )
 
-    file_handler.setFormatter(logging.Formatter(**formatting))
+    file_handler.setFormatter(
+        JsonFormatter() if json_lines else logging.Formatter(**formatting)
+    )
 
     console_handler = logging.StreamHandler()
 
     console_handler.setFormatter(ColorFormatter(**formatting))
 
-    logger.addHandler(file_handler)
+    return [file_handler, console_handler]
+
+
+def enable_async(json_lines: bool = False) -> None:
+    if ASYNC_STATE["listener"]:
+        return
+
+    q: queue.SimpleQueue = queue.SimpleQueue()
+
+    handler = QueueHandler(q)
+
+    listener = QueueListener(q, *build_handlers(json_lines), respect_handler_level=True)
+
+    listener.start()
+
+    ASYNC_STATE.update(handler=handler, listener=listener)
+
+    for logger in LOGGERS:
+        SYNC_HANDLERS[logger.name] = logger.handlers[:]
+
+        logger.handlers = [handler]
+
+
+def stop_async() -> None:
+    if not (listener := ASYNC_STATE["listener"]):
+        return
+
+    rate_limit.flush()
+
+    listener.stop()
 
-    logger.addHandler(console_handler)
+    for handler in listener.handlers:
+        handler.close()
+
+    ASYNC_STATE.update(handler=None, listener=None)
+
+    for logger in LOGGERS:
+        logger.handlers = SYNC_HANDLERS.pop(logger.name, None) or build_handlers()
+
+
+def get_logger(name: str | None = None) -> logging.Logger:
+    if not name:
+        name = Path(__file__).stem
+
+    logger = logging.getLogger(name)
+
+    logger.setLevel(logging.INFO)
+
+    if logger.hasHandlers():
+        return logger
+
+    if handler := ASYNC_STATE["handler"]:
+        logger.addHandler(handler)
+
+    else:
+        for handler in build_handlers():
+            logger.addHandler(handler)
+
+    logger.addFilter(rate_limit)
 
     logger.propagate = False
 
+    LOGGERS.append(logger)
+
     return logger
 
 
-__all__ = ["get_logger", "ColorFormatter"]
+__all__ = [
+    "get_logger",
+    "rate_limit",
+    "enable_async",
+    "stop_async",
+    "ColorFormatter",
+    "JsonFormatter",
+    "RateLimitFilter",
+]
@@ -0,0 +1,88 @@
+import re
+from collections.abc import Callable, Iterable
+
+from .config import leagues
+from .webwork import network
+
+Filter = Callable[["Entry"], bool] | str | Iterable[str] | None
+
+
+def slugify(s: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", s.lower()).strip("-") or "other"
+
+
+def render(event: str, info: dict[str, str | float], group: str) -> str:
+    return "\n".join(
+        [
+            f'" tvg-id="{info["id"]}" tvg-name="{event}" '
+            f'tvg-logo="{info["logo"]}" group-title="Live Events - {group}",{event}',
+            f'#EXTVLCOPT:http-referrer={info["base"]}',
+            f'#EXTVLCOPT:http-origin={info["base"]}',
+            f"#EXTVLCOPT:http-user-agent={network.UA}",
+            info["url"],
+        ]
+    )
+
+
+class Entry:
+    __slots__ = ("event", "group", "slug", "index", "tail")
+
+    def __init__(self, event: str, info: dict[str, str | float], index: int) -> None:
+        sport = event[1 : event.find("]")] if event.startswith("[") else ""
+
+        self.event = event
+
+        self.group = leagues.group(info.get("id"), sport)
+
+        self.slug = slugify(self.group)
+
+        self.index = index
+
+        self.tail = render(event, info, self.group)
+
+    def render(self, offset: int = 0) -> str:
+        return f'\n#EXTINF:-1 tvg-chno="{offset + self.index}{self.tail}'
+
+
+class Playlists:
+    def __init__(self, additions: dict[str, dict[str, str | float]]) -> None:
+        self.entries = [
+            Entry(event, info, i)
+            for i, (event, info) in enumerate(sorted(additions.items()), start=1)
+        ]
+
+        self.groups: dict[str, list[Entry]] = {}
+
+        for entry in self.entries:
+            self.groups.setdefault(entry.slug, []).append(entry)
+
+    def select(self, filter: Filter = None) -> list[Entry]:
+        match filter:
+            case None:
+                return self.entries
+
+            case str():
+                return self.groups.get(slugify(filter), [])
+
+            case _ if callable(filter):
+                return [entry for entry in self.entries if filter(entry)]
+
+            case _:
+                slugs = {slugify(name) for name in filter}
+
+                return [entry for entry in self.entries if entry.slug in slugs]
+
+    def lines(self, filter: Filter = None, offset: int = 0) -> list[str]:
+        return [entry.render(offset) for entry in self.select(filter)]
+
+    def build_playlist(
+        self,
+        filter: Filter = None,
+        header: str = "#EXTM3U\n",
+        offset: int = 0,
+    ) -> str:
+
+        return header + "\n".join(self.lines(filter, offset))
+
+
+__all__ = ["Playlists", "slugify"]
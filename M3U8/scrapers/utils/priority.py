@@ -0,0 +1,110 @@
+import json
+import logging
+import math
+import re
+import time
+from collections.abc import Iterator
+from pathlib import Path
+
+from .config import Time, leagues
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+TOP_LEAGUES = ("NFL.", "NBA.", "MLB.", "NHL.")
+
+
+class Demand:
+    def __init__(self) -> None:
+        self.file = Path(__file__).parent.parent / "caches" / "demand.json"
+
+        try:
+            self.counts: dict[str, int] = json.loads(
+                self.file.read_text(encoding="utf-8")
+            )
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.counts = {}
+
+    @staticmethod
+    def key(name: str) -> str:
+        return re.sub(r"\s+\(\w+\)$", "", name).lower()
+
+    def record(self, name: str) -> None:
+        key = self.key(name)
+
+        self.counts[key] = self.counts.get(key, 0) + 1
+
+    def get(self, name: str) -> int:
+        return self.counts.get(self.key(name), 0)
+
+    def save(self) -> None:
+        self.file.parent.mkdir(parents=True, exist_ok=True)
+
+        self.file.write_text(json.dumps(self.counts, indent=2), encoding="utf-8")
+
+
+class Scheduler:
+    def __init__(self) -> None:
+        self.demand = Demand()
+
+        self.deadline: float | None = None
+
+    def start(self, budget: int | float | None = None) -> None:
+        self.deadline = None if budget is None else time.monotonic() + budget
+
+    def remaining(self) -> float | None:
+        if self.deadline is None:
+            return
+
+        return max(0, self.deadline - time.monotonic())
+
+    @staticmethod
+    def tier(sport: str, event: str) -> float:
+        tvg_id, _ = leagues.get_tvg_info(sport, event)
+
+        if not tvg_id:
+            return 0.3
+
+        return 1.0 if tvg_id.startswith(TOP_LEAGUES) else 0.6
+
+    def score(self, ev: dict[str, str | float], now: float) -> float:
+        if event_ts := ev.get("event_ts"):
+            proximity = 1 / (1 + abs(event_ts - now) / 1_800)
+        else:
+            proximity = 0.5
+
+        hits = self.demand.get(f"[{ev['sport']}] {ev['event']}")
+
+        demand = min(1.0, math.log1p(hits) / 5)
+
+        return (
+            0.5 * proximity + 0.3 * self.tier(ev["sport"], ev["event"]) + 0.2 * demand
+        )
+
+    def order(
+        self,
+        events: list[dict[str, str | float]],
+        log: logging.Logger | None = None,
+    ) -> Iterator[dict[str, str | float]]:
+
+        log = log or logger
+
+        now = Time.now().timestamp()
+
+        ranked = sorted(events, key=lambda ev: self.score(ev, now), reverse=True)
+
+        for done, ev in enumerate(ranked):
+            if self.deadline and time.monotonic() >= self.deadline:
+                log.warning(
+                    f"Run budget exhausted, skipping {len(ranked) - done} "
+                    "lower-priority event(s)"
+                )
+
+                return
+
+            yield ev
+
+
+scheduler = Scheduler()
+
+__all__ = ["scheduler", "Scheduler"]
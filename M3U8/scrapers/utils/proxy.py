@@ -0,0 +1,284 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import os
+import re
+import time
+from urllib.parse import urljoin
+
+import httpx
+
+from .logger import get_logger
+from .priority import scheduler
+from .segments import SegmentCache
+from .webwork import network
+
+logger = get_logger(__name__)
+
+URI_ATTR = re.compile(r'URI="([^"]+)"')
+
+
+class Upstream:
+    __slots__ = (
+        "url",
+        "status",
+        "content_type",
+        "body",
+        "expires",
+        "rewritten",
+        "is_playlist",
+    )
+
+    def __init__(
+        self,
+        url: str,
+        status: int,
+        content_type: str,
+        body: bytes | memoryview,
+        expires: float = 0,
+    ) -> None:
+
+        self.url = url
+
+        self.status = status
+
+        self.content_type = content_type
+
+        self.body = body
+
+        self.expires = expires
+
+        self.rewritten: bytes | None = None
+
+        self.is_playlist = bytes(body[:64]).lstrip().startswith(b"#EXTM3U")
+
+
+class HLSProxy:
+    def __init__(
+        self,
+        ttl: int | float = 2,
+        prefetch: int = 3,
+        segments: SegmentCache | None = None,
+    ) -> None:
+
+        self.ttl = ttl
+
+        self.prefetch_count = prefetch
+
+        self.segments = segments or SegmentCache()
+
+        self.client = network.build_client()
+
+        self.secret = os.urandom(16)
+
+        self.streams: dict[str, dict[str, str]] = {}
+
+        self.cache: dict[str, Upstream] = {}
+
+        self.inflight: dict[str, asyncio.Task] = {}
+
+        self.requests = self.upstream_fetches = self.prefetched = 0
+
+    def register(
+        self,
+        additions: dict[str, dict[str, str | float]],
+        public_url: str,
+    ) -> dict[str, dict[str, str | float]]:
+
+        proxied = {}
+
+        streams = {}
+
+        for event, info in additions.items():
+            sid = hashlib.sha1(info["url"].encode("utf-8")).hexdigest()[:16]
+
+            streams[sid] = {"url": info["url"], "base": info["base"], "event": event}
+
+            proxied[event] = info | {"url": f"{public_url}/proxy/{sid}/index.m3u8"}
+
+        self.streams = streams
+
+        return proxied
+
+    def sign(self, url: str) -> str:
+        return hmac.new(self.secret, url.encode("utf-8"), "sha256").hexdigest()[:16]
+
+    def encode(self, sid: str, url: str) -> str:
+        token = base64.urlsafe_b64encode(url.encode("utf-8")).decode("ascii")
+
+        return f"/proxy/{sid}/{self.sign(url)}/{token.rstrip('=')}"
+
+    def decode(self, sig: str, token: str) -> str | None:
+        try:
+            url = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        except (ValueError, UnicodeDecodeError):
+            return
+
+        return url if hmac.compare_digest(sig, self.sign(url)) else None
+
+    def rewrite(self, sid: str, text: str, url: str) -> str:
+        lines = []
+
+        for line in text.splitlines():
+            if line.startswith("#"):
+                line = URI_ATTR.sub(
+                    lambda m: f'URI="{self.encode(sid, urljoin(url, m[1]))}"',
+                    line,
+                )
+
+            elif line.strip():
+                line = self.encode(sid, urljoin(url, line.strip()))
+
+            lines.append(line)
+
+        return "\n".join(lines) + "\n"
+
+    async def download(self, url: str, base: str) -> Upstream:
+        self.upstream_fetches += 1
+
+        try:
+            r = await self.client.get(
+                url,
+                headers={"Referer": base, "Origin": base.rstrip("/")},
+            )
+        except httpx.HTTPError as e:
+            logger.warning(f'Upstream fetch failed for "{url}": {e}')
+
+            return Upstream(url, 502, "text/plain", b"")
+
+        upstream = Upstream(
+            str(r.url),
+            r.status_code,
+            r.headers.get("content-type", "application/octet-stream"),
+            r.content,
+        )
+
+        if upstream.status != 200:
+            return upstream
+
+        if upstream.is_playlist:
+            upstream.expires = time.monotonic() + self.ttl
+
+            self.cache[url] = upstream
+
+            self.prefetch(upstream, base)
+
+        else:
+            upstream.body = self.segments.put(url, upstream.content_type, r.content)
+
+        return upstream
+
+    def start(self, url: str, base: str) -> asyncio.Task:
+        if not (task := self.inflight.get(url)):
+            task = self.inflight[url] = asyncio.create_task(self.download(url, base))
+
+            task.add_done_callback(lambda _: self.inflight.pop(url, None))
+
+        return task
+
+    def prefetch(self, playlist: Upstream, base: str) -> None:
+        if not self.prefetch_count or b"#EXTINF" not in playlist.body:
+            return
+
+        segments = [
+            urljoin(playlist.url, line.strip())
+            for line in playlist.body.decode("utf-8").splitlines()
+            if line.strip() and not line.startswith("#")
+        ]
+
+        for url in segments[-self.prefetch_count :]:
+            if url in self.segments or url in self.inflight:
+                continue
+
+            self.prefetched += 1
+
+            self.start(url, base)
+
+    async def fetch(self, url: str, base: str) -> Upstream:
+        now = time.monotonic()
+
+        if (cached := self.cache.get(url)) and cached.expires > now:
+            return cached
+
+        if hit := self.segments.get(url):
+            return Upstream(url, 200, *hit)
+
+        if len(self.cache) > 256:
+            self.cache = {k: v for k, v in self.cache.items() if v.expires > now}
+
+        joined = url in self.inflight
+
+        upstream = await asyncio.shield(self.start(url, base))
+
+        if upstream.status == 200 and not upstream.is_playlist:
+            if joined:
+                self.segments.record_hit(len(upstream.body))
+
+            else:
+                self.segments.record_miss()
+
+        return upstream
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "streams": len(self.streams),
+            "requests": self.requests,
+            "upstream_fetches": self.upstream_fetches,
+            "prefetched": self.prefetched,
+            **self.segments.stats(),
+        }
+
+    async def handle(self, path: str) -> tuple[int, dict[str, str], bytes]:
+        self.requests += 1
+
+        match path.strip("/").split("/"):
+            case ["proxy", "stats"]:
+                return (
+                    200,
+                    {"Content-Type": "application/json"},
+                    json.dumps(self.stats()).encode("utf-8"),
+                )
+
+            case ["proxy", sid, "index.m3u8"] if sid in self.streams:
+                url = self.streams[sid]["url"]
+
+                scheduler.demand.record(self.streams[sid]["event"])
+
+            case ["proxy", sid, sig, token] if sid in self.streams:
+                if not (url := self.decode(sig, token)):
+                    return 404, {}, b""
+
+            case _:
+                return 404, {}, b""
+
+        upstream = await self.fetch(url, self.streams[sid]["base"])
+
+        if upstream.status != 200:
+            return 502, {}, b""
+
+        if upstream.is_playlist:
+            if upstream.rewritten is None:
+                upstream.rewritten = self.rewrite(
+                    sid,
+                    upstream.body.decode("utf-8"),
+                    upstream.url,
+                ).encode("utf-8")
+
+            return (
+                200,
+                {
+                    "Content-Type": "application/vnd.apple.mpegurl",
+                    "Cache-Control": "no-cache",
+                },
+                upstream.rewritten,
+            )
+
+        return 200, {"Content-Type": upstream.content_type}, upstream.body
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+__all__ = ["HLSProxy"]
@@ -0,0 +1,173 @@
+import base64
+import json
+from pathlib import Path
+
+import httpx
+from playwright.async_api import BrowserContext
+
+HAR_FILE = "browser.har"
+
+
+class RecordTransport(httpx.AsyncBaseTransport):
+    def __init__(self, harness: "Harness") -> None:
+        self.harness = harness
+
+        self.wrapped = httpx.AsyncHTTPTransport(http2=True)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.harness.requests += 1
+
+        response = await self.wrapped.handle_async_request(request)
+
+        raw = b"".join([chunk async for chunk in response.aiter_raw()])
+
+        await response.aclose()
+
+        self.harness.exchanges[f"{request.method} {request.url}"] = {
+            "status": response.status_code,
+            "headers": [
+                (k, v)
+                for k, v in response.headers.multi_items()
+                if k.lower() not in {"content-length", "transfer-encoding"}
+            ],
+            "body": base64.b64encode(raw).decode("ascii"),
+        }
+
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            content=raw,
+            request=request,
+        )
+
+    async def aclose(self) -> None:
+        await self.wrapped.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    def __init__(self, harness: "Harness") -> None:
+        self.harness = harness
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.harness.requests += 1
+
+        if not (ex := self.harness.exchanges.get(f"{request.method} {request.url}")):
+            self.harness.misses += 1
+
+            return httpx.Response(404, request=request)
+
+        return httpx.Response(
+            ex["status"],
+            headers=ex["headers"],
+            content=base64.b64decode(ex["body"]),
+            request=request,
+        )
+
+
+class Harness:
+    def __init__(self) -> None:
+        self.root = Path(__file__).parent.parent.parent / "fixtures"
+
+        self.mode: str | None = None
+
+        self.source: str | None = None
+
+        self.exchanges: dict[str, dict] = {}
+
+        self.reset()
+
+    @property
+    def folder(self) -> Path:
+        return self.root / self.source
+
+    def reset(self) -> None:
+        self.contexts = self.pages = self.requests = self.misses = 0
+
+    def start(self, mode: str, source: str) -> httpx.AsyncBaseTransport:
+        self.mode, self.source = mode, source
+
+        self.reset()
+
+        if mode == "record":
+            self.exchanges = {}
+
+            self.folder.mkdir(parents=True, exist_ok=True)
+
+            for stale in self.folder.glob("*.har"):
+                stale.unlink()
+
+            return RecordTransport(self)
+
+        self.exchanges = json.loads(
+            (self.folder / "http.json").read_text(encoding="utf-8")
+        )
+
+        return ReplayTransport(self)
+
+    def merge_hars(self) -> None:
+        har: dict | None = None
+
+        for part in sorted(self.folder.glob("context-*.har")):
+            data = json.loads(part.read_text(encoding="utf-8"))
+
+            if har is None:
+                har = data
+
+            else:
+                har["log"]["entries"].extend(data["log"]["entries"])
+
+            part.unlink()
+
+        if har:
+            (self.folder / HAR_FILE).write_text(json.dumps(har), encoding="utf-8")
+
+    def stop(self) -> dict[str, int]:
+        if self.mode == "record":
+            (self.folder / "http.json").write_text(
+                json.dumps(self.exchanges, indent=2),
+                encoding="utf-8",
+            )
+
+            self.merge_hars()
+
+        self.mode = None
+
+        return {
+            "contexts": self.contexts,
+            "pages": self.pages,
+            "requests": self.requests,
+            "misses": self.misses,
+        }
+
+    def count_page(self, _) -> None:
+        self.pages += 1
+
+    def count_request(self, _) -> None:
+        self.requests += 1
+
+    async def attach(self, context: BrowserContext) -> None:
+        if not self.mode:
+            return
+
+        self.contexts += 1
+
+        context.on("page", self.count_page)
+
+        context.on("request", self.count_request)
+
+        if self.mode == "record":
+            await context.route_from_har(
+                self.folder / f"context-{self.contexts}.har",
+                update=True,
+            )
+
+        elif (har := self.folder / HAR_FILE).exists():
+            await context.route_from_har(har, not_found="abort")
+
+        else:
+            await context.route("**/*", lambda route: route.abort())
+
+
+harness = Harness()
+
+__all__ = ["harness", "Harness"]
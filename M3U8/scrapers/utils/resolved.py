@@ -0,0 +1,81 @@
+import logging
+
+import httpx
+
+from .caching import Cache
+from .config import Time
+from .logger import get_logger
+from .webwork import network
+
+logger = get_logger(__name__)
+
+
+class ResolvedUrls:
+    def __init__(self, tag: str, base: str, exp: int | float = 86_400) -> None:
+        self.cache = Cache(f"{tag}-resolved", exp=exp)
+
+        self.base = base
+
+        self.entries: dict[str, dict[str, str | float]] | None = None
+
+        self.dropped: set[str] = set()
+
+        self.hits = self.probes = 0
+
+    def load(self) -> dict[str, dict[str, str | float]]:
+        if self.entries is None:
+            self.entries = self.cache.load()
+
+        return self.entries
+
+    async def is_valid(self, url: str) -> bool:
+        try:
+            async with network.HTTP_S:
+                r = await network.client.get(
+                    url,
+                    headers={"Referer": self.base, "Origin": self.base},
+                    timeout=3,
+                )
+        except httpx.HTTPError:
+            return False
+
+        return r.status_code == 200 and r.content.lstrip().startswith(b"#EXTM3U")
+
+    async def probe(
+        self,
+        link: str,
+        url_num: int,
+        log: logging.Logger | None = None,
+    ) -> str | None:
+
+        log = log or logger
+
+        if not (entry := self.load().get(link)):
+            return
+
+        self.probes += 1
+
+        if not await self.is_valid(entry["url"]):
+            self.entries.pop(link, None)
+
+            self.dropped.add(link)
+
+            return
+
+        self.hits += 1
+
+        log.info(f"URL {url_num}) Reused previously resolved M3U8")
+
+        return entry["url"]
+
+    def store(self, link: str, url: str) -> None:
+        self.load()[link] = {"url": url, "timestamp": Time.now().timestamp()}
+
+    def save(self) -> None:
+        if self.entries is not None:
+            self.cache.write(self.entries, drop=self.dropped)
+
+            self.dropped.clear()
+
+
+__all__ = ["ResolvedUrls"]
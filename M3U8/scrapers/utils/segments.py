@@ -0,0 +1,71 @@
+from collections import OrderedDict
+
+
+class SegmentCache:
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024) -> None:
+        self.max_bytes = max_bytes
+
+        self.size = 0
+
+        self.entries: OrderedDict[str, tuple[str, memoryview]] = OrderedDict()
+
+        self.hits = self.misses = self.bytes_saved = self.evictions = 0
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.entries
+
+    def get(self, url: str) -> tuple[str, memoryview] | None:
+        if not (entry := self.entries.get(url)):
+            return
+
+        self.entries.move_to_end(url)
+
+        self.record_hit(len(entry[1]))
+
+        return entry
+
+    def record_hit(self, nbytes: int) -> None:
+        self.hits += 1
+
+        self.bytes_saved += nbytes
+
+    def record_miss(self) -> None:
+        self.misses += 1
+
+    def put(self, url: str, content_type: str, body: bytes) -> memoryview:
+        view = memoryview(body)
+
+        if len(view) > self.max_bytes:
+            return view
+
+        if old := self.entries.pop(url, None):
+            self.size -= len(old[1])
+
+        while self.entries and self.size + len(view) > self.max_bytes:
+            _, (_, evicted) = self.entries.popitem(last=False)
+
+            self.size -= len(evicted)
+
+            self.evictions += 1
+
+        self.entries[url] = (content_type, view)
+
+        self.size += len(view)
+
+        return view
+
+    def stats(self) -> dict[str, int | float]:
+        total = self.hits + self.misses
+
+        return {
+            "segments": len(self.entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "evictions": self.evictions,
+        }
+
+
+__all__ = ["SegmentCache"]
@@ -0,0 +1,206 @@
+import asyncio
+import gzip
+import hashlib
+from email.utils import formatdate
+
+from .logger import get_logger
+from .proxy import HLSProxy
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = get_logger(__name__)
+
+REASONS = {
+    200: "OK",
+    304: "Not Modified",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    502: "Bad Gateway",
+}
+
+
+class Variant:
+    __slots__ = ("bodies", "etags")
+
+    def __init__(self, text: str) -> None:
+        raw = text.encode("utf-8")
+
+        digest = hashlib.sha256(raw).hexdigest()[:32]
+
+        self.bodies = {"identity": raw, "gzip": gzip.compress(raw, mtime=0)}
+
+        if brotli:
+            self.bodies["br"] = brotli.compress(raw)
+
+        self.etags = {
+            enc: f'"{digest}"' if enc == "identity" else f'"{digest}-{enc}"'
+            for enc in self.bodies
+        }
+
+    def negotiate(self, accept_encoding: str) -> str:
+        accepted = {
+            part.split(";", 1)[0].strip().lower()
+            for part in accept_encoding.split(",")
+            if not part.strip().endswith(";q=0")
+        }
+
+        return next(
+            (enc for enc in ("br", "gzip") if enc in accepted and enc in self.bodies),
+            "identity",
+        )
+
+
+class PlaylistServer:
+    def __init__(self, proxy: HLSProxy | None = None) -> None:
+        self.proxy = proxy
+
+        self.variants: dict[str, Variant] = {}
+
+        self.updated = formatdate(usegmt=True)
+
+    def update(self, playlists: dict[str, str]) -> None:
+        self.variants = {f"/{path}": Variant(text) for path, text in playlists.items()}
+
+        self.updated = formatdate(usegmt=True)
+
+        logger.info(f"Serving {len(self.variants)} playlist variant(s)")
+
+    async def respond(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        headers: dict[str, str] | None = None,
+        body: bytes = b"",
+        head: bool = False,
+    ) -> None:
+
+        headers = {
+            "Date": formatdate(usegmt=True),
+            "Content-Length": str(len(body)),
+            **(headers or {}),
+        }
+
+        lines = [f"HTTP/1.1 {status} {REASONS[status]}"]
+
+        lines.extend(f"{k}: {v}" for k, v in headers.items())
+
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+        if body and not head:
+            writer.write(body)
+
+        await writer.drain()
+
+    async def handle_request(
+        self,
+        writer: asyncio.StreamWriter,
+        method: str,
+        target: str,
+        headers: dict[str, str],
+    ) -> None:
+
+        if method not in {"GET", "HEAD"}:
+            await self.respond(writer, 405, {"Allow": "GET, HEAD"})
+
+            return
+
+        path = target.split("?", 1)[0]
+
+        if self.proxy and path.startswith("/proxy/"):
+            status, proxy_headers, body = await self.proxy.handle(path)
+
+            await self.respond(
+                writer,
+                status,
+                proxy_headers,
+                body,
+                head=method == "HEAD",
+            )
+
+            return
+
+        if not (variant := self.variants.get(path)):
+            await self.respond(writer, 404)
+
+            return
+
+        enc = variant.negotiate(headers.get("accept-encoding", ""))
+
+        etag = variant.etags[enc]
+
+        common = {
+            "ETag": etag,
+            "Vary": "Accept-Encoding",
+            "Cache-Control": "no-cache",
+            "Last-Modified": self.updated,
+        }
+
+        if_none_match = headers.get("if-none-match", "")
+
+        if if_none_match.strip() == "*" or etag in {
+            tag.strip() for tag in if_none_match.split(",")
+        }:
+            await self.respond(writer, 304, common)
+
+            return
+
+        if enc != "identity":
+            common["Content-Encoding"] = enc
+
+        await self.respond(
+            writer,
+            200,
+            {"Content-Type": "audio/x-mpegurl; charset=utf-8", **common},
+            variant.bodies[enc],
+            head=method == "HEAD",
+        )
+
+    async def handle(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+
+        try:
+            while request_line := await reader.readline():
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self.respond(writer, 400, {"Connection": "close"})
+
+                    break
+
+                headers = {}
+
+                while (line := await reader.readline()) not in {b"\r\n", b"\n", b""}:
+                    name, _, value = line.decode("latin-1").partition(":")
+
+                    headers[name.strip().lower()] = value.strip()
+
+                await self.handle_request(writer, method, target, headers)
+
+                if headers.get("connection", "").lower() == "close" or (
+                    version == "HTTP/1.0"
+                    and headers.get("connection", "").lower() != "keep-alive"
+                ):
+                    break
+
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+
+        finally:
+            writer.close()
+
+    async def start(self, host: str, port: int) -> asyncio.Server:
+        server = await asyncio.start_server(self.handle, host, port)
+
+        logger.info(f"Serving playlists on http://{host}:{port}")
+
+        return server
+
+
+__all__ = ["PlaylistServer"]
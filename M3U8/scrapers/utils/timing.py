@@ -0,0 +1,127 @@
+import json
+from bisect import bisect_left
+from pathlib import Path
+
+BUCKETS = (0.25, 0.5, 0.75, 1, 1.5, 2, 3, 4, 6, 8, 12, 16, 24, 32)
+
+
+class Timings:
+    MIN_SAMPLES = 20
+
+    QUANTILE = 0.99
+
+    HEADROOM = 1.2
+
+    MIN_WAIT = 1.5
+
+    LATE_RATE = 0.005
+
+    SECOND_CHANCE = 3
+
+    PROBE_EVERY = 10
+
+    MAX_SAMPLES = 500
+
+    def __init__(self) -> None:
+        self.file = Path(__file__).parent.parent / "caches" / "timings.json"
+
+        self.data = self.read()
+
+        self.touched: set[str] = set()
+
+    def read(self) -> dict[str, dict[str, list[int] | int]]:
+        try:
+            return json.loads(self.file.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def stats(self, source: str) -> dict[str, list[int] | int]:
+        self.touched.add(source)
+
+        return self.data.setdefault(
+            source,
+            {"counts": [0] * (len(BUCKETS) + 1), "misses": 0},
+        )
+
+    def decay(self, stats: dict[str, list[int] | int]) -> None:
+        if sum(stats["counts"]) + stats["misses"] > self.MAX_SAMPLES:
+            stats["counts"] = [count // 2 for count in stats["counts"]]
+
+            stats["misses"] //= 2
+
+    def record(self, source: str, seconds: float) -> None:
+        stats = self.stats(source)
+
+        stats["counts"][bisect_left(BUCKETS, seconds)] += 1
+
+        self.decay(stats)
+
+    def miss(self, source: str) -> None:
+        stats = self.stats(source)
+
+        stats["misses"] += 1
+
+        self.decay(stats)
+
+    def quantile(self, source: str, q: float) -> float | None:
+        if not (stats := self.data.get(source)):
+            return
+
+        if (total := sum(counts := stats["counts"])) < self.MIN_SAMPLES:
+            return
+
+        seen = 0
+
+        for i, count in enumerate(counts):
+            seen += count
+
+            if seen >= q * total:
+                return BUCKETS[i] if i < len(BUCKETS) else None
+
+    def late_rate(self, source: str, wait: float) -> float | None:
+        if not (stats := self.data.get(source)):
+            return
+
+        counts = stats["counts"]
+
+        if (total := sum(counts) + stats["misses"]) < self.MIN_SAMPLES:
+            return
+
+        return sum(counts[bisect_left(BUCKETS, wait) + 1 :]) / total
+
+    def probe(self, source: str) -> bool:
+        if not (stats := self.data.get(source)):
+            return True
+
+        return (sum(stats["counts"]) + stats["misses"]) % self.PROBE_EVERY == 0
+
+    def wait(self, source: str, default: int | float) -> float:
+        if (p := self.quantile(source, self.QUANTILE)) is None or self.probe(source):
+            return default
+
+        return min(default, max(self.MIN_WAIT, p * self.HEADROOM))
+
+    def second_chance(self, source: str, default: int | float) -> float:
+        wait = self.wait(source, default)
+
+        if (rate := self.late_rate(source, wait)) is None or rate < self.LATE_RATE:
+            return 0
+
+        return min(self.SECOND_CHANCE, max(0, default - wait))
+
+    def save(self) -> None:
+        if not self.touched:
+            return
+
+        data = self.read() | {source: self.data[source] for source in self.touched}
+
+        self.file.parent.mkdir(parents=True, exist_ok=True)
+
+        self.file.write_text(json.dumps(data, indent=2), encoding="utf-8")
+
+        self.touched.clear()
+
+
+timings = Timings()
+
+__all__ = ["timings", "Timings"]
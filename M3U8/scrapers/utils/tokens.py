@@ -0,0 +1,106 @@
+import base64
+import json
+import re
+from urllib.parse import parse_qsl, unquote, urlparse
+
+from .config import Time
+
+EXPIRY_KEYS = {"expires", "expire", "expiry", "exp", "e", "validto", "valid_to"}
+
+TOKEN_KEYS = {"token", "t", "auth", "st", "sig", "hdnts", "hdnea", "__hdnea__"}
+
+START_KEYS = {"t", "st"}
+
+EMBEDDED_EXP = re.compile(r"(?:^|[~&;,])exp(?:ires)?=(\d{10,13})")
+
+EMBEDDED_TS = re.compile(r"(?<!\d)(1[6-9]\d{8}|2\d{9})(?!\d)")
+
+
+class Tokens:
+    REFRESH_MARGIN = 300
+
+    @staticmethod
+    def to_seconds(value: str) -> float | None:
+        if not value.isdigit() or len(value) not in (10, 13):
+            return
+
+        return int(value) / 1000 if len(value) == 13 else float(value)
+
+    @staticmethod
+    def jwt_exp(value: str) -> float | None:
+        if value.count(".") != 2:
+            return
+
+        payload = value.split(".")[1]
+
+        try:
+            claims = json.loads(
+                base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+            )
+        except (ValueError, UnicodeDecodeError):
+            return
+
+        return (
+            float(exp)
+            if isinstance(claims, dict) and (exp := claims.get("exp"))
+            else None
+        )
+
+    def expiry(self, url: str) -> float | None:
+        now = Time.now().timestamp()
+
+        candidates = []
+
+        for key, value in parse_qsl(urlparse(url).query, keep_blank_values=True):
+            key, value = key.lower(), unquote(value)
+
+            if key in EXPIRY_KEYS:
+                candidates.append(self.to_seconds(value))
+
+            elif key in TOKEN_KEYS:
+                if m := EMBEDDED_EXP.search(value):
+                    candidates.append(self.to_seconds(m[1]))
+
+                elif jwt := self.jwt_exp(value):
+                    candidates.append(jwt)
+
+                elif key not in START_KEYS:
+                    candidates.extend(
+                        self.to_seconds(ts) for ts in EMBEDDED_TS.findall(value)
+                    )
+
+        valid = [ts for ts in candidates if ts and now < ts < now + 7 * 86_400]
+
+        return min(valid, default=None)
+
+    def annotate(self, entries: dict[str, dict]) -> int:
+        found = 0
+
+        for entry in entries.values():
+            if not (url := entry.get("url")) or "expires" in entry:
+                continue
+
+            if expires := self.expiry(url):
+                entry["expires"] = expires
+
+                found += 1
+
+        return found
+
+    @staticmethod
+    def earliest(entries: dict[str, dict]) -> float | None:
+        now = Time.now().timestamp()
+
+        return min(
+            (
+                expires
+                for e in entries.values()
+                if (expires := e.get("expires")) and expires > now
+            ),
+            default=None,
+        )
+
+
+tokens = Tokens()
+
+__all__ = ["tokens", "Tokens"]
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import re
+from urllib.parse import urljoin
+
+from .logger import get_logger
+from .webwork import network
+
+logger = get_logger(__name__)
+
+ATTR_PATTERN = re.compile(r'([A-Z0-9-]+)=("[^"]*"|[^,]*)')
+
+
+class Variants:
+    POLICIES = ("master", "best", "lowest")
+
+    @staticmethod
+    def parse(text: str, url: str) -> list[dict[str, str | int]] | None:
+        if "#EXT-X-STREAM-INF" not in text:
+            return
+
+        variants = []
+
+        attrs: dict[str, str] | None = None
+
+        for line in map(str.strip, text.splitlines()):
+            if line.startswith("#EXT-X-STREAM-INF:"):
+                attrs = {
+                    k: v.strip('"')
+                    for k, v in ATTR_PATTERN.findall(line.split(":", 1)[1])
+                }
+
+            elif line and not line.startswith("#") and attrs is not None:
+                variants.append(
+                    {
+                        "url": urljoin(url, line),
+                        "bandwidth": int(attrs.get("BANDWIDTH", 0) or 0),
+                        "resolution": attrs.get("RESOLUTION", ""),
+                        "codecs": attrs.get("CODECS", ""),
+                    }
+                )
+
+                attrs = None
+
+        return sorted(variants, key=lambda v: v["bandwidth"], reverse=True)
+
+    async def resolve(
+        self,
+        entry: dict,
+        log: logging.Logger,
+    ) -> list[dict[str, str | int]]:
+
+        headers = {"Referer": entry["base"], "Origin": entry["base"]}
+
+        async with network.HTTP_S:
+            r = await network.request(entry["url"], log=log, headers=headers)
+
+        if not r:
+            return []
+
+        return self.parse(r.text, str(r.url)) or []
+
+    async def resolve_all(
+        self,
+        entries: dict[str, dict],
+        log: logging.Logger | None = None,
+    ) -> None:
+
+        log = log or logger
+
+        pending = [
+            entry
+            for entry in entries.values()
+            if entry.get("url") and "variants" not in entry
+        ]
+
+        if not pending:
+            return
+
+        results = await asyncio.gather(*(self.resolve(e, log) for e in pending))
+
+        for entry, found in zip(pending, results):
+            entry["variants"] = found
+
+        masters = sum(1 for found in results if found)
+
+        log.info(f"Resolved variants for {masters}/{len(pending)} master playlist(s)")
+
+    @staticmethod
+    def choose(entry: dict, policy: str = "master") -> str:
+        if policy == "master" or not (found := entry.get("variants")):
+            return entry["url"]
+
+        return found[0]["url"] if policy == "best" else found[-1]["url"]
+
+
+variants = Variants()
+
+__all__ = ["variants", "Variants"]
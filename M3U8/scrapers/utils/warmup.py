@@ -0,0 +1,104 @@
+import asyncio
+import time
+from collections.abc import Iterable, Mapping
+from urllib.parse import urlparse
+
+import httpx
+from playwright.async_api import Browser
+
+from .dns import dns
+from .logger import get_logger
+from .webwork import BrowserPool, network
+
+logger = get_logger(__name__)
+
+
+class Warmup:
+    TIMEOUT = 3
+
+    @staticmethod
+    def origins(urls: Iterable[str]) -> set[str]:
+        return {
+            f"{parsed.scheme}://{parsed.netloc}"
+            for url in urls
+            if url
+            and (parsed := urlparse(url if "://" in url else f"https://{url}"))
+            and parsed.hostname
+        }
+
+    @staticmethod
+    async def resolve(host: str) -> str | None:
+        async with network.HTTP_S:
+            return await dns.resolve(host)
+
+    async def connect(self, origin: str) -> bool:
+        async with network.HTTP_S:
+            try:
+                await network.client.head(f"{origin}/", timeout=self.TIMEOUT)
+            except httpx.HTTPError:
+                return False
+
+        return True
+
+    async def preconnect(self, browser: Browser, origins: set[str]) -> None:
+        links = "".join(
+            f'<link rel="preconnect" href="{origin}" crossorigin>'
+            f'<link rel="dns-prefetch" href="//{urlparse(origin).netloc}">'
+            for origin in sorted(origins)
+        )
+
+        async with network.event_context(browser) as context:
+            async with network.event_page(context) as page:
+                await page.set_content(f"<html><head>{links}</head></html>")
+
+                await asyncio.sleep(1)
+
+    @staticmethod
+    def shards(browsers: Iterable[Browser | BrowserPool]) -> list[Browser]:
+        return [
+            shard
+            for browser in browsers
+            for shard in (
+                browser.browsers if isinstance(browser, BrowserPool) else [browser]
+            )
+            if shard
+        ]
+
+    async def run(
+        self,
+        base_urls: Iterable[str],
+        browsers: Iterable[Browser | BrowserPool] = (),
+    ) -> None:
+
+        start = time.perf_counter()
+
+        origins = self.origins([*base_urls, *dns.streams])
+
+        hosts = {urlparse(origin).hostname for origin in origins}
+
+        await asyncio.gather(*(self.resolve(host) for host in hosts))
+
+        results = await asyncio.gather(
+            *(self.connect(origin) for origin in origins),
+            *(self.preconnect(browser, origins) for browser in self.shards(browsers)),
+            return_exceptions=True,
+        )
+
+        connected = sum(r is True for r in results[: len(origins)])
+
+        dns.save()
+
+        logger.info(
+            f"Warmed up {connected}/{len(origins)} host(s) "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+
+    def remember(self, entries: Mapping[str, Mapping]) -> None:
+        dns.remember(self.origins(entry.get("url") for entry in entries.values()))
+
+        dns.save()
+
+
+warmup = Warmup()
+
+__all__ = ["warmup", "Warmup"]
@@ -2,15 +2,22 @@ import asyncio
 import logging
 import random
 import re
-from collections.abc import Awaitable, Callable
+import time
+from collections.abc import Awaitable, Callable, Iterable
 from contextlib import asynccontextmanager
 from functools import partial
 from typing import AsyncGenerator, TypeVar
+from urllib.parse import urlparse
 
 import httpx
 from playwright.async_api import Browser, BrowserContext, Page, Playwright, Request
 
+from .breaker import breakers
+from .dns import CachedTransport, dns
+from .history import run_stats
 from .logger import get_logger
+from .replay import harness
+from .timing import timings
 
 logger = get_logger(__name__)
 
@@ -26,14 +33,47 @@ class Network:
 
     HTTP_S = asyncio.Semaphore(10)
 
-    PW_S = asyncio.Semaphore(3)
+    PW_LIMIT = 3
+
+    PW_S = asyncio.Semaphore(PW_LIMIT)
+
+    SKIPPED = object()
+
+    M3U8_PATTERN = re.compile(
+        r"^(?!.*(amazonaws|knitcdn|jwpltx)).*\.m3u8",
+        re.IGNORECASE,
+    )
 
     def __init__(self) -> None:
-        self.client = httpx.AsyncClient(
+        self.client = self.build_client()
+
+        self.pw_workers = self.PW_LIMIT
+
+    @staticmethod
+    def build_client(
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> httpx.AsyncClient:
+
+        mounts = None
+
+        if transport is None:
+            limits = httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=20,
+                keepalive_expiry=60,
+            )
+
+            transport = CachedTransport(dns, limits=limits, http2=True)
+
+            mounts = CachedTransport.proxy_mounts(limits, http2=True)
+
+        return httpx.AsyncClient(
             timeout=httpx.Timeout(5.0),
             follow_redirects=True,
             headers={"User-Agent": Network.UA},
             http2=True,
+            transport=transport,
+            mounts=mounts,
         )
 
     async def request(
@@ -45,17 +85,40 @@ class Network:
 
         log = log or logger
 
+        host = urlparse(url).netloc
+
+        breaker = breakers.get(f"host:{host}")
+
+        if not breaker.allow():
+            log.warning(f'Skipping "{url}": circuit open for {host}')
+
+            return ""
+
+        probe = breaker.probing
+
         try:
             r = await self.client.get(url, **kwargs)
 
             r.raise_for_status()
 
+            breaker.success()
+
             return r
         except (httpx.HTTPError, httpx.TimeoutException) as e:
+            if isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500:
+                breaker.success()
+
+            elif breaker.failure():
+                log.warning(f"Circuit opened for {host}")
+
             log.error(f'Failed to fetch "{url}": {e}')
 
             return ""
 
+        finally:
+            if probe:
+                breaker.release()
+
     async def get_base(self, mirrors: list[str]) -> str | None:
         random.shuffle(mirrors)
 
@@ -79,40 +142,94 @@ class Network:
 
         log = log or logger
 
+        breaker = breakers.get(f"source:{log.name}")
+
         async with semaphore:
-            task = asyncio.create_task(fn())
+            if not breaker.allow():
+                log.warning(f"URL {url_num}) Circuit open, skipping event")
 
-            try:
-                return await asyncio.wait_for(task, timeout=timeout)
+                return Network.SKIPPED
 
-            except asyncio.TimeoutError:
-                log.warning(
-                    f"URL {url_num}) Timed out after {timeout}s, skipping event"
-                )
+            probe = breaker.probing
 
-                task.cancel()
+            start = time.perf_counter()
+
+            try:
+                task = asyncio.create_task(fn())
 
                 try:
-                    await task
-                except asyncio.CancelledError:
-                    pass
+                    result = await asyncio.wait_for(task, timeout=timeout)
+
+                except asyncio.TimeoutError:
+                    run_stats.record_capture(log.name, False)
+
+                    if breaker.failure():
+                        log.warning(f"Circuit opened for {log.name}")
+
+                    log.warning(
+                        f"URL {url_num}) Timed out after {timeout}s, skipping event",
+                        extra={"duration": round(time.perf_counter() - start, 3)},
+                    )
+
+                    task.cancel()
 
+                    try:
+                        await task
+                    except asyncio.CancelledError:
+                        pass
+
+                    except Exception as e:
+                        log.debug(f"URL {url_num}) Ignore exception after timeout: {e}")
+
+                    return
                 except Exception as e:
-                    log.debug(f"URL {url_num}) Ignore exception after timeout: {e}")
+                    run_stats.record_capture(log.name, False)
 
-                return
-            except Exception as e:
-                log.error(f"URL {url_num}) Unexpected error: {e}")
+                    if breaker.failure():
+                        log.warning(f"Circuit opened for {log.name}")
 
-                return
+                    log.error(
+                        f"URL {url_num}) Unexpected error: {e}",
+                        extra={"duration": round(time.perf_counter() - start, 3)},
+                    )
+
+                    return
+
+                run_stats.record_capture(log.name, bool(result))
+
+                if result:
+                    run_stats.record_first(log.name)
+
+                    breaker.success()
+
+                elif breaker.failure():
+                    log.warning(f"Circuit opened for {log.name}")
+
+                return result
+
+            finally:
+                if probe:
+                    breaker.release()
 
     @staticmethod
     @asynccontextmanager
     async def event_context(
-        browser: Browser,
+        browser: "Browser | BrowserContext | BrowserPool",
         stealth: bool = True,
         ignore_https: bool = False,
     ) -> AsyncGenerator[BrowserContext, None]:
+        if isinstance(browser, BrowserContext):
+            yield browser
+
+            return
+
+        if isinstance(browser, BrowserPool):
+            async with browser.lease() as leased:
+                async with Network.event_context(leased, stealth, ignore_https) as ctx:
+                    yield ctx
+
+            return
+
         context: BrowserContext | None = None
 
         try:
@@ -189,12 +306,44 @@ class Network:
             else:
                 context = await browser.new_context()
 
+            await harness.attach(context)
+
             yield context
 
         finally:
             if context:
                 await context.close()
 
+    @staticmethod
+    @asynccontextmanager
+    async def shared_context(
+        browser: "Browser | BrowserPool",
+    ) -> AsyncGenerator["BrowserContext | BrowserPool", None]:
+        if isinstance(browser, BrowserPool):
+            yield browser
+
+            return
+
+        async with Network.event_context(browser) as context:
+            yield context
+
+    async def for_each(
+        self,
+        items: Iterable[T],
+        fn: Callable[[T], Awaitable[None]],
+        limit: int | None = None,
+    ) -> None:
+
+        limit = limit or self.pw_workers
+
+        pending = iter(items)
+
+        async def worker() -> None:
+            for item in pending:
+                await fn(item)
+
+        await asyncio.gather(*(worker() for _ in range(limit)))
+
     @staticmethod
     @asynccontextmanager
     async def event_page(context: BrowserContext) -> AsyncGenerator[Page, None]:
@@ -221,18 +370,44 @@ class Network:
         got_one: asyncio.Event,
     ) -> None:
 
-        invalids = ["amazonaws", "knitcdn", "jwpltx"]
+        if Network.M3U8_PATTERN.search(req.url):
+            captured.append(req.url)
+            got_one.set()
+
+    @staticmethod
+    async def wait_for_capture(
+        got_one: asyncio.Event,
+        url_num: int,
+        timeout: int | float,
+        log: logging.Logger,
+    ) -> bool:
 
-        escaped = [re.escape(i) for i in invalids]
+        start = time.perf_counter()
 
-        pattern = re.compile(
-            rf"^(?!.*({'|'.join(escaped)})).*\.m3u8",
-            re.IGNORECASE,
+        budgets = (
+            timings.wait(log.name, timeout),
+            timings.second_chance(log.name, timeout),
         )
 
-        if pattern.search(req.url):
-            captured.append(req.url)
-            got_one.set()
+        for n, budget in enumerate(budgets):
+            if budget <= 0:
+                break
+
+            if n:
+                log.info(f"URL {url_num}) Second chance, waiting {budget:.1f}s more")
+
+            try:
+                await asyncio.wait_for(got_one.wait(), timeout=budget)
+            except asyncio.TimeoutError:
+                continue
+
+            timings.record(log.name, time.perf_counter() - start)
+
+            return True
+
+        timings.miss(log.name)
+
+        return False
 
     async def process_event(
         self,
@@ -257,6 +432,8 @@ class Network:
 
         page.on("request", handler)
 
+        start = time.perf_counter()
+
         try:
             await page.goto(
                 url,
@@ -264,26 +441,16 @@ class Network:
                 timeout=15_000,
             )
 
-            wait_task = asyncio.create_task(got_one.wait())
-
-            try:
-                await asyncio.wait_for(wait_task, timeout=timeout)
-            except asyncio.TimeoutError:
+            if not await self.wait_for_capture(got_one, url_num, timeout, log):
                 log.warning(f"URL {url_num}) Timed out waiting for M3U8.")
 
                 return
 
-            finally:
-                if not wait_task.done():
-                    wait_task.cancel()
-
-                    try:
-                        await wait_task
-                    except asyncio.CancelledError:
-                        pass
-
             if captured:
-                log.info(f"URL {url_num}) Captured M3U8")
+                log.info(
+                    f"URL {url_num}) Captured M3U8",
+                    extra={"duration": round(time.perf_counter() - start, 3)},
+                )
 
                 return captured[0]
 
@@ -300,6 +467,84 @@ class Network:
             page.remove_listener("request", handler)
 
 
+class BrowserPool:
+    def __init__(self, playwright: Playwright, size: int) -> None:
+        self.playwright = playwright
+
+        self.size = size
+
+        self.browsers: list[Browser | None] = [None] * size
+
+        self.loads = [0] * size
+
+        self.restarts: dict[int, asyncio.Task] = {}
+
+        self.closing = False
+
+    async def launch(self, idx: int) -> Browser:
+        browser = await Network.browser(self.playwright)
+
+        browser.on("disconnected", partial(self.on_disconnect, idx))
+
+        self.browsers[idx] = browser
+
+        return browser
+
+    async def start(self) -> "BrowserPool":
+        await asyncio.gather(*(self.launch(i) for i in range(self.size)))
+
+        logger.info(f"Launched {self.size} browser shard(s)")
+
+        return self
+
+    def on_disconnect(self, idx: int, _: Browser) -> None:
+        self.browsers[idx] = None
+
+        if self.closing:
+            return
+
+        logger.warning(f"Browser shard {idx} disconnected, restarting")
+
+        self.restarts[idx] = asyncio.create_task(self.launch(idx))
+
+    async def revive(self, idx: int) -> Browser:
+        if not (task := self.restarts.get(idx)) or task.done():
+            task = self.restarts[idx] = asyncio.create_task(self.launch(idx))
+
+        try:
+            return await task
+        except Exception as e:
+            logger.error(f"Failed to restart browser shard {idx}: {e}")
+
+        if browser := next((b for b in self.browsers if b), None):
+            return browser
+
+        raise RuntimeError("No browser shards available")
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncGenerator[Browser, None]:
+        idx = min(range(self.size), key=lambda i: self.loads[i])
+
+        self.loads[idx] += 1
+
+        try:
+            yield self.browsers[idx] or await self.revive(idx)
+
+        finally:
+            self.loads[idx] -= 1
+
+    async def close(self) -> None:
+        self.closing = True
+
+        for task in self.restarts.values():
+            task.cancel()
+
+        await asyncio.gather(
+            *(b.close() for b in self.browsers if b),
+            return_exceptions=True,
+        )
+
+
 network = Network()
 
-__all__ = ["network"]
+__all__ = ["network", "BrowserPool"]
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import resource
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+import fetch
+from scrapers.utils import (
+    Cache,
+    Playlists,
+    StreamEntry,
+    Time,
+    get_logger,
+    guide,
+    leagues,
+    merge,
+)
+
+log = get_logger(__name__)
+
+RESULTS_FILE = Path(__file__).parent / "fixtures" / "pipeline.json"
+
+SPORTS = ["NBA", "NFL", "Soccer", "Ice Hockey", "MLB", "Tennis", "Darts", "UFC"]
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_feed(file: Path, size_mb: int, programmes: int = 200) -> int:
+    target = size_mb * 1024 * 1024
+
+    channels = 0
+
+    with file.open("w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<tv>\n')
+
+        while f.tell() < target:
+            cid = f"Channel.{channels}.us"
+
+            f.write(
+                f'  <channel id="{cid}">\n'
+                f"    <display-name>Channel {channels}</display-name>\n"
+                "  </channel>\n"
+            )
+
+            for p in range(programmes):
+                f.write(
+                    f'  <programme start="20260101{p % 24:02d}0000 +0000" '
+                    f'stop="20260101{p % 24:02d}3000 +0000" channel="{cid}">\n'
+                    f"    <title>Programme {p} on {cid}</title>\n"
+                    f"    <desc>{'Synthetic description. ' * 8}</desc>\n"
+                    "  </programme>\n"
+                )
+
+            channels += 1
+
+        f.write("</tv>\n")
+
+    return channels
+
+
+def bench_epg(args: argparse.Namespace) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp:
+        feed, out = Path(tmp) / "feed.xml", Path(tmp) / "TV.xml"
+
+        channels = write_feed(feed, args.size)
+
+        ids = frozenset(f"Channel.{i}.us" for i in range(0, channels, args.every))
+
+        rss_before = peak_rss_mb()
+
+        start = time.perf_counter()
+
+        stats = guide.merge([feed], ids, out)
+
+        elapsed = time.perf_counter() - start
+
+        size_mb = feed.stat().st_size / 1024 / 1024
+
+        return {
+            "input_mb": round(size_mb, 1),
+            "output_mb": round(out.stat().st_size / 1024 / 1024, 1),
+            "channels_in": channels,
+            **stats,
+            "seconds": round(elapsed, 3),
+            "mb_per_s": round(size_mb / elapsed, 1),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+            "rss_growth_mb": round(peak_rss_mb() - rss_before, 1),
+        }
+
+
+def make_entries(count: int, sources: int, model: type) -> list[dict]:
+    now = time.time()
+
+    return [
+        {
+            f"[{SPORTS[i % len(SPORTS)]}] Team {i} vs Team {i + 1} (SRC{s})": model(
+                url=f"https://cdn{i % 7}.example.com/live/{i}/index.m3u8?token={i:x}",
+                logo="".join(["https://example.com/logos/", str(i % 40), ".png"]),
+                base="".join(["https://source", str(s), ".example.com/"]),
+                timestamp=now,
+                id="".join(["League", str(i % 40), ".Dummy.us"]),
+                link=f"https://source{s}.example.com/event/{i}",
+            )
+            for i in range(s, count, sources)
+        }
+        for s in range(sources)
+    ]
+
+
+def measure(build: Callable[[], object]) -> tuple[object, float, float]:
+    tracemalloc.start()
+
+    start = time.perf_counter()
+
+    result = build()
+
+    elapsed = time.perf_counter() - start
+
+    size = tracemalloc.get_traced_memory()[0]
+
+    tracemalloc.stop()
+
+    return result, elapsed, size / 1024 / 1024
+
+
+def bench_entries(args: argparse.Namespace) -> dict[str, dict[str, float]]:
+    results = {}
+
+    for name, model, combine in (
+        ("dict", dict, lambda maps: {k: v for m in maps for k, v in m.items()}),
+        ("StreamEntry", StreamEntry, merge),
+    ):
+        maps, build_s, build_mb = measure(
+            lambda: make_entries(args.count, args.sources, model)
+        )
+
+        merged, merge_s, merge_mb = measure(
+            lambda maps=maps, combine=combine: sorted(combine(maps).items())
+        )
+
+        assert len(merged) == args.count
+
+        results[name] = {
+            "build_s": round(build_s, 3),
+            "entries_mb": round(build_mb, 1),
+            "merge_sort_ms": round(merge_s * 1000, 2),
+            "merge_sort_mb": round(merge_mb, 2),
+        }
+
+        del maps, merged
+
+    return results
+
+
+def write_base(file: Path, channels: int) -> None:
+    with file.open("w", encoding="utf-8") as f:
+        f.write('#EXTM3U url-tvg="https://example.com/TV.xml"\n')
+
+        for i in range(1, channels + 1):
+            f.write(
+                f'\n#EXTINF:-1 tvg-chno="{i}" tvg-id="Channel.{i}.us" '
+                f'tvg-name="Channel {i}" group-title="TV",Channel {i}\n'
+                f"https://example.com/channel/{i}/index.m3u8\n"
+            )
+
+
+def profile(stage: Callable[[], object], memory: bool) -> dict[str, float]:
+    start = time.perf_counter()
+
+    stage()
+
+    result = {"ms": round((time.perf_counter() - start) * 1000, 2)}
+
+    if memory:
+        tracemalloc.start()
+
+        stage()
+
+        result["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 2)
+
+        tracemalloc.stop()
+
+    return result
+
+
+def bench_size(count: int, tmp: Path, memory: bool) -> dict[str, dict[str, float]]:
+    maps = make_entries(count, 20, StreamEntry)
+
+    fetch.BASE_FILE = tmp / "base.m3u8"
+
+    write_base(fetch.BASE_FILE, max(100, count // 10))
+
+    base_m3u8, tvg_chno = fetch.load_base()
+
+    additions = merge(maps)
+
+    playlists = fetch.build_playlists(additions, base_m3u8, tvg_chno)
+
+    samples = list(additions.items())[:10_000]
+
+    cache = Cache("bench", exp=10_800)
+
+    def write() -> None:
+        for name in (fetch.COMBINED_FILE.name, fetch.EVENTS_FILE.name):
+            fetch.write_atomic(tmp / name, playlists[name])
+
+    stages = {
+        "load_base": fetch.load_base,
+        "merge": lambda: len(merge(maps)),
+        "sort": lambda: sorted(additions.items()),
+        "format": lambda: Playlists(additions),
+        "build_playlists": lambda: fetch.build_playlists(
+            additions, base_m3u8, tvg_chno
+        ),
+        "write": write,
+        "leagues_10k": lambda: [
+            leagues.get_tvg_info(k[1 : k.find("]")], k[k.find("]") + 2 :])
+            for k, _ in samples
+        ],
+        "time_10k": lambda: [
+            Time.clean(Time.from_ts(v["timestamp"])) for _, v in samples
+        ],
+        "is_fresh_10k": lambda: [cache.is_fresh(v) for _, v in samples],
+    }
+
+    return {name: profile(stage, memory) for name, stage in stages.items()}
+
+
+def commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def bench_pipeline(args: argparse.Namespace) -> dict[str, dict[str, dict]]:
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.sizes:
+            results[str(count)] = bench_size(count, Path(tmp), not args.no_memory)
+
+            log.info(f"pipeline {count:>9,}: {results[str(count)]}")
+
+    try:
+        stored = json.loads(args.results.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        stored = {}
+
+    rev = commit()
+
+    for prev_rev, prev in reversed(stored.items()):
+        if prev_rev == rev:
+            continue
+
+        for count, stages in results.items():
+            for stage, value in stages.items():
+                if old := prev["sizes"].get(count, {}).get(stage, {}).get("ms"):
+                    log.info(
+                        f"{count:>9} {stage:<16} {old:>10.2f}ms -> "
+                        f"{value['ms']:>10.2f}ms ({value['ms'] / old:.2f}x vs {prev_rev})"
+                    )
+
+        break
+
+    stored[rev] = {"ts": Time.now().timestamp(), "sizes": results}
+
+    args.results.parent.mkdir(parents=True, exist_ok=True)
+
+    args.results.write_text(json.dumps(stored, indent=2), encoding="utf-8")
+
+    log.info(f"Results saved to {args.results.resolve()} under {rev}")
+
+    return results
+
+
+BENCHES: dict[str, Callable[[argparse.Namespace], dict]] = {
+    "epg": bench_epg,
+    "entries": bench_entries,
+    "pipeline": bench_pipeline,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Synthetic pipeline benchmarks")
+
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    epg = sub.add_parser("epg", help="stream-merge a synthetic XMLTV feed")
+
+    epg.add_argument("--size", type=int, default=500, help="feed size in MB")
+
+    epg.add_argument("--every", type=int, default=10, help="keep every Nth channel")
+
+    entries = sub.add_parser("entries", help="compare event models on synthetic data")
+
+    entries.add_argument("--count", type=int, default=100_000)
+
+    entries.add_argument("--sources", type=int, default=20)
+
+    pipeline = sub.add_parser("pipeline", help="time the playlist pipeline stages")
+
+    pipeline.add_argument(
+        "--sizes",
+        nargs="+",
+        type=int,
+        default=[1_000, 10_000, 100_000, 1_000_000],
+    )
+
+    pipeline.add_argument("--no-memory", action="store_true", help="skip tracemalloc")
+
+    pipeline.add_argument("--results", type=Path, default=RESULTS_FILE)
+
+    parser.add_argument("--out", type=Path, help="write results as JSON")
+
+    args = parser.parse_args()
+
+    results = BENCHES[args.bench](args)
+
+    log.info(f"{args.bench}: {results}")
+
+    if args.out:
+        args.out.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
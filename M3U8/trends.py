@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+import argparse
+from statistics import median
+
+from scrapers.utils import Time, get_logger, history
+
+log = get_logger(__name__)
+
+
+def ratio(pair: list[int] | None) -> float | None:
+    return pair[0] / pair[1] if pair and pair[1] else None
+
+
+def metrics(stats: dict) -> dict[str, float | None]:
+    return {
+        "events": stats.get("events"),
+        "captures": ratio(stats.get("captures")),
+        "cache": ratio(stats.get("cache")),
+        "duration": stats.get("duration"),
+        "first": stats.get("first_capture"),
+    }
+
+
+def baseline(runs: list[dict], tag: str) -> dict[str, float | None]:
+    values: dict[str, list[float]] = {}
+
+    for run in runs:
+        if not (stats := run["tags"].get(tag)):
+            continue
+
+        for key, value in metrics(stats).items():
+            if value is not None:
+                values.setdefault(key, []).append(value)
+
+    return {key: median(vals) for key, vals in values.items()}
+
+
+def regressions(
+    current: dict[str, float | None],
+    base: dict[str, float | None],
+    drop: float,
+    slowdown: float,
+) -> list[str]:
+
+    flagged = []
+
+    for key in ("events", "captures", "cache"):
+        now, prev = current.get(key), base.get(key)
+
+        if now is not None and prev and now < prev * (1 - drop):
+            flagged.append(f"{key} {prev:.2f} -> {now:.2f}")
+
+    now, prev = current.get("duration"), base.get("duration")
+
+    if now is not None and prev and now > prev * (1 + slowdown):
+        flagged.append(f"duration {prev:.1f}s -> {now:.1f}s")
+
+    return flagged
+
+
+def fmt(value: float | None, spec: str) -> str:
+    return "-" if value is None else format(value, spec)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Report scraper trends from run history"
+    )
+
+    parser.add_argument("--window", type=int, default=10, help="runs in the baseline")
+
+    parser.add_argument("--drop", type=float, default=0.5, help="allowed ratio drop")
+
+    parser.add_argument("--slowdown", type=float, default=0.5, help="allowed slowdown")
+
+    parser.add_argument("--tag", help="only report this TAG")
+
+    args = parser.parse_args()
+
+    if len(runs := history.load(limit=args.window + 1)) < 2:
+        log.info("Not enough run history to compare")
+
+        return 0
+
+    *previous, latest = runs
+
+    log.info(
+        f"Latest run {Time.from_ts(latest['ts']):%Y-%m-%d %H:%M} "
+        f"({latest['duration']:.1f}s) vs median of {len(previous)} run(s)"
+    )
+
+    failed = False
+
+    for tag in sorted(latest["tags"]):
+        if args.tag and tag != args.tag.upper():
+            continue
+
+        current = metrics(latest["tags"][tag])
+
+        base = baseline(previous, tag)
+
+        line = (
+            f"{tag:<14} events {fmt(current['events'], '>4')} "
+            f"(~{fmt(base.get('events'), '>6.1f')})  "
+            f"captures {fmt(current['captures'], '>4.0%')} "
+            f"(~{fmt(base.get('captures'), '>4.0%')})  "
+            f"cache {fmt(current['cache'], '>4.0%')} "
+            f"(~{fmt(base.get('cache'), '>4.0%')})  "
+            f"{fmt(current['duration'], '>6.1f')}s "
+            f"(~{fmt(base.get('duration'), '>6.1f')}s)  "
+            f"first {fmt(current['first'], '>5.1f')}s "
+            f"(~{fmt(base.get('first'), '>5.1f')}s)"
+        )
+
+        if flagged := regressions(current, base, args.drop, args.slowdown):
+            failed = True
+
+            log.warning(f"{line}  REGRESSION: {', '.join(flagged)}")
+
+        else:
+            log.info(line)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())